@@ -9,29 +9,56 @@ import joblib
 import os
 import torch
 import sys
-from transformers import EsmTokenizer, EsmModel
+import json
+import hashlib
 
 # Add src to path to import data_engineering
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
 from data_engineering.populate_kinetics import generate_ground_truth
+from data_engineering.sequence_descriptors import radar_scores
+from data_engineering.enzyme_registry import EnzymeRegistry
+from data_engineering.esm_embedding import (MODEL_NAME, EMBEDDING_DIM, DEFAULT_INFERENCE_MODE, DEFAULT_NUM_THREADS,
+                                            load_esm, load_esm_lm, embed_sequences, is_valid_sequence,
+                                            embedding_model_key, WindowedEmbedder)
+from data_engineering.embedding_cache import EmbeddingCache
+from data_engineering.feature_store import DEFAULT_STORE_PATH, store_exists, load_features
+from ai_model.mutant_scoring import AMINO_ACIDS, STRATEGIES, score_point_mutants, top_mutants
+
+DMS_CACHE_DIR = os.path.join("data", "cache", "dms")
 
 class DesignEngine:
-    def __init__(self, custom_dataframe=None):
+    def __init__(self, custom_dataframe=None, esm_mode=DEFAULT_INFERENCE_MODE, esm_threads=DEFAULT_NUM_THREADS,
+                 windowed=False):
         self.model_path = "models/yield_predictor.pkl"
-        self.features_path = "data/processed/enzyme_features.csv"
+        self.features_path = DEFAULT_STORE_PATH
+        self.features_csv_path = "data/processed/enzyme_features.csv"
         self.kinetics_path = "data/processed/enzyme_kinetics.csv"
         self.cols_path = "models/yield_predictor_cols.pkl"
         
         self.model = None
-        self.df_features = None
+        self.feature_matrix = None # [n_enzymes, n_dims] (memory-mapped)
+        self.feature_index = None # id -> row of feature_matrix
+        self.feature_names = None
         self.df_kinetics = None
+        self.registry = None # id-indexed view of df_kinetics
         self.feature_cols = None
         self.custom_df = custom_dataframe # Store injected data
         
         # ESM-2 Model (Loaded lazily)
         self.tokenizer = None
         self.esm_model = None
+        self.esm_mode = esm_mode # 'fp32', or e.g. 'int8+script' on CPU-only boxes (see benchmark_esm.py)
+        self.esm_threads = esm_threads
+        # Overlapping-window embeddings for sequences beyond the ESM context (instead of truncation);
+        # use with features generated by generate_features.py --windowed
+        self.windowed = windowed
+        self.windowed_embedder = None
+        self.esm_lm = None # Masked-LM head model for mutant scoring (Loaded lazily)
+        self.mutant_scores = {} # sequence -> [L, 20] log-likelihood ratios
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        # Shared with generate_features: sequences embedded once are never re-run through ESM
+        self.embedding_cache = EmbeddingCache(embedding_model_key(MODEL_NAME, esm_mode),
+                                              pooling='mean+windowed' if windowed else 'mean')
         
         self.load_resources()
 
@@ -41,14 +68,22 @@ class DesignEngine:
                 self.model = joblib.load(self.model_path)
             except:
                 print("Warning: Could not load model (shape mismatch?). Retraining required.")
-        if os.path.exists(self.features_path):
-            self.df_features = pd.read_csv(self.features_path)
+        if store_exists(self.features_path):
+            self.feature_matrix, self.feature_index, self.feature_names = load_features(self.features_path)
+        elif os.path.exists(self.features_csv_path):
+            # Legacy text table (convert once with feature_store.py)
+            df_features = pd.read_csv(self.features_csv_path)
+            self.feature_names = [c for c in df_features.columns if c != 'id']
+            self.feature_matrix = df_features[self.feature_names].to_numpy()
+            self.feature_index = {eid: row for row, eid in enumerate(df_features['id'])}
             
         # Priority: Injected DF > Disk CSV
         if self.custom_df is not None:
             self.df_kinetics = self.custom_df
         elif os.path.exists(self.kinetics_path):
             self.df_kinetics = pd.read_csv(self.kinetics_path)
+        if self.df_kinetics is not None:
+            self.registry = EnzymeRegistry(self.df_kinetics)
         if os.path.exists(self.cols_path):
             self.feature_cols = joblib.load(self.cols_path)
             
@@ -56,24 +91,101 @@ class DesignEngine:
         if self.esm_model is None:
             print("Loading ESM-2 Model for Design Engine...")
             try:
-                self.tokenizer = EsmTokenizer.from_pretrained("facebook/esm2_t6_8M_UR50D")
-                self.esm_model = EsmModel.from_pretrained("facebook/esm2_t6_8M_UR50D").to(self.device)
-                self.esm_model.eval()
+                self.tokenizer, self.esm_model, self.device = load_esm(
+                    MODEL_NAME, self.device, mode=self.esm_mode, num_threads=self.esm_threads
+                )
+                if self.windowed:
+                    self.windowed_embedder = WindowedEmbedder(self.tokenizer, self.esm_model, self.device, pooling='mean')
             except Exception as e:
                 print(f"Error loading ESM-2: {e}")
 
-    def _get_embedding(self, sequence):
-        self._load_esm()
-        if self.esm_model is None:
-            return np.zeros(320)
-            
-        with torch.no_grad():
-            inputs = self.tokenizer(sequence, return_tensors="pt", truncation=True, max_length=1024)
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
-            outputs = self.esm_model(**inputs)
-            # Mean pooling
-            embedding = outputs.last_hidden_state.mean(dim=1).cpu().numpy()[0]
-        return embedding
+    def _load_esm_lm(self):
+        if self.esm_lm is None:
+            print("Loading ESM-2 Language Model for mutant scoring...")
+            try:
+                self.tokenizer, self.esm_lm, _ = load_esm_lm(MODEL_NAME, self.device)
+            except Exception as e:
+                print(f"Error loading ESM-2 LM: {e}")
+
+    def score_mutants(self, sequence, strategy='masked_marginal'):
+        """
+        ESM log-likelihood ratios for all L x 19 point mutants (see mutant_scoring.py), cached per sequence.
+        Returns None if the language model is unavailable.
+        """
+        key = (strategy, sequence)
+        if key not in self.mutant_scores:
+            self._load_esm_lm()
+            if self.esm_lm is None:
+                return None
+            self.mutant_scores[key] = score_point_mutants(sequence, self.tokenizer, self.esm_lm, self.device, strategy)
+        return self.mutant_scores[key]
+
+    def _candidate_mutants(self, sequence, n, strategy='random'):
+        """
+        Candidate point mutants as (sequence, description, prior score or None).
+        'random': n random substitutions. 'masked_marginal' / 'wt_marginal': the n best of all
+        L x 19 substitutions under the ESM likelihood prior (falls back to random without the LM).
+        """
+        if strategy != 'random':
+            if strategy not in STRATEGIES:
+                raise ValueError(f"Unknown strategy '{strategy}'. Use 'random' or one of {STRATEGIES}.")
+            llr = self.score_mutants(sequence, strategy)
+            if llr is not None:
+                return top_mutants(sequence, llr, n)
+            print("Warning: ESM LM unavailable, falling back to random mutants.")
+        return [self._mutate_sequence(sequence) + (None,) for _ in range(n)]
+
+    def _get_embeddings(self, sequences, use_store=True):
+        """
+        Embeddings for many sequences: store hits are read back, misses run through ESM in padded,
+        length-bucketed batches (one forward pass for a typical set of point mutants).
+        use_store=False embeds without touching the embedding store (one-off bulk sets such as scans).
+        """
+        def compute(missing):
+            self._load_esm()
+            if self.esm_model is None:
+                return np.zeros((len(missing), EMBEDDING_DIM))
+            return embed_sequences(missing, self.tokenizer, self.esm_model, self.device, pooling='mean',
+                                   windowed=self.windowed_embedder)[0]
+
+        sequences = list(sequences)
+        out = np.zeros((len(sequences), EMBEDDING_DIM))
+        valid = [i for i, seq in enumerate(sequences) if is_valid_sequence(seq)]
+        if valid and use_store:
+            out[valid] = self.embedding_cache.embed([sequences[i] for i in valid], compute)
+        elif valid:
+            out[valid] = compute([sequences[i] for i in valid])
+        return out
+
+    def _feature_matrix(self, embeddings, temp, ph, substrate):
+        """
+        Model input [n, len(feature_cols)] in feature_cols order: embedding dims (dim_j), temp, ph, substrate one-hot.
+        Columns the model knows but the inputs do not provide are 0.
+        """
+        X = np.zeros((embeddings.shape[0], len(self.feature_cols)))
+        for j, col in enumerate(self.feature_cols):
+            if col == 'temp':
+                X[:, j] = temp
+            elif col == 'ph':
+                X[:, j] = ph
+            elif col.startswith('sub_'):
+                X[:, j] = float(substrate == col.replace('sub_', ''))
+            elif col.startswith('dim_') and int(col[4:]) < embeddings.shape[1]:
+                X[:, j] = embeddings[:, int(col[4:])]
+        return pd.DataFrame(X, columns=self.feature_cols)
+
+    def evaluate_candidates(self, sequences, temp, ph, substrate="Cellulose", return_std=False, use_store=True):
+        """
+        Predicted yield for N sequences with one batched embedding pass and a single predict call.
+        Returns predictions (and GPR std with return_std=True); zeros if no model is loaded.
+        """
+        if self.model is None:
+            zeros = np.zeros(len(sequences))
+            return (zeros, zeros.copy()) if return_std else zeros
+        X = self._feature_matrix(self._get_embeddings(sequences, use_store), temp, ph, substrate)
+        if return_std:
+            return self.model.predict(X, return_std=True)
+        return self.model.predict(X)
 
     def calculate_properties(self, sequence):
         """
@@ -83,70 +195,46 @@ class DesignEngine:
                   Normalized to 1-5 scale for Radar Chart.
         """
         if not sequence: return {'Hydrophobicity': 3, 'Charge': 3, 'Stability': 3}
-        
-        # 1. Kyte-Doolittle Hydrophobicity
-        kd = {
-            'I': 4.5, 'V': 4.2, 'L': 3.8, 'F': 2.8, 'C': 2.5, 'M': 1.9, 'A': 1.8, 
-            'G': -0.4, 'T': -0.7, 'S': -0.8, 'W': -0.9, 'Y': -1.3, 'P': -1.6, 
-            'H': -3.2, 'E': -3.5, 'Q': -3.5, 'D': -3.5, 'N': -3.5, 'K': -3.9, 'R': -4.5
-        }
-        hydro = sum(kd.get(aa, 0) for aa in sequence) / len(sequence)
-        # Scale: -4.0 to 4.0 -> Map to 1-5
-        # Avg usually around -0.5 to 0.5. 
-        hydro_score = min(5, max(1, 3 + hydro))
-        
-        # 2. Net Charge (at pH 7)
-        pos = sequence.count('R') + sequence.count('K')
-        neg = sequence.count('D') + sequence.count('E')
-        net_charge = pos - neg
-        # Scale: -10 to +10 -> Map to 1-5
-        charge_score = min(5, max(1, 3 + (net_charge / 5)))
-        
-        # 3. Stability (Mock based on A/V/L/I content vs G/S)
-        # Aliphatic index proxy
-        aliphatic = sum(sequence.count(aa) for aa in ['A','V','L','I'])
-        flexible = sum(sequence.count(aa) for aa in ['G','S'])
-        stability_ratio = aliphatic / (flexible + 1)
-        stab_score = min(5, max(1, stability_ratio * 3))
-        
+
+        # Kyte-Doolittle hydrophobicity, net charge at pH 7, stability (aliphatic A/V/L/I vs flexible G/S content)
+        hydro_score, charge_score, stab_score = radar_scores([sequence])
         return {
-            'Hydrophobicity': round(hydro_score, 1),
-            'Charge': round(charge_score, 1),
-            'Stability': round(stab_score, 1)
+            'Hydrophobicity': round(float(hydro_score[0]), 1),
+            'Charge': round(float(charge_score[0]), 1),
+            'Stability': round(float(stab_score[0]), 1)
         }
 
     def recommend_best_enzyme(self, temp, ph, substrate="Cellulose"):
-        if self.model is None or self.df_features is None:
+        if self.model is None or self.feature_matrix is None:
             return None, 0.0, "Model not loaded"
 
-        # Prepare input dataframe
-        df_input = self.df_features.copy()
-        
-        # Add Environment columns
-        df_input['temp'] = temp
-        df_input['ph'] = ph
-        df_input['substrate'] = substrate
-        
-        # One-Hot Encoding for Substrate
-        sub_cols = [c for c in self.feature_cols if c.startswith('sub_')]
-        for col in sub_cols:
-            target_sub = col.replace('sub_', '')
-            df_input[col] = (df_input['substrate'] == target_sub).astype(int)
-            
-        # Select columns in correct order
-        try:
-            X = df_input[self.feature_cols]
-        except KeyError as e:
-            return None, 0.0, f"Feature mismatch: {e}"
+        # Input matrix in feature_cols order: enzyme features + environment columns
+        n = self.feature_matrix.shape[0]
+        col_pos = {c: j for j, c in enumerate(self.feature_names)}
+        X = np.zeros((n, len(self.feature_cols)))
+        for j, col in enumerate(self.feature_cols):
+            if col == 'temp':
+                X[:, j] = temp
+            elif col == 'ph':
+                X[:, j] = ph
+            elif col.startswith('sub_'):
+                # One-Hot Encoding for Substrate
+                X[:, j] = float(substrate == col.replace('sub_', ''))
+            elif col in col_pos:
+                X[:, j] = self.feature_matrix[:, col_pos[col]]
+            else:
+                return None, 0.0, f"Feature mismatch: '{col}'"
         
         # Predict
-        yields = self.model.predict(X)
+        yields = self.model.predict(pd.DataFrame(X, columns=self.feature_cols))
+        ids = list(self.feature_index)
         
         best_idx = np.argmax(yields)
         best_yield = yields[best_idx]
-        best_id = df_input.iloc[best_idx]['id']
+        best_id = ids[best_idx]
         
-        meta = self.df_kinetics[self.df_kinetics['id'] == best_id].iloc[0].to_dict()
+        meta = self.registry.record(best_id) if self.registry is not None else None
+        meta = meta or {}
         
         return {
             'id': best_id,
@@ -199,127 +287,158 @@ class DesignEngine:
         except:
             return sequence
 
-    def propose_optimization(self, base_enzyme_id, temp, ph, substrate="Cellulose"):
+    def propose_optimization(self, base_enzyme_id, temp, ph, substrate="Cellulose", strategy='random', n_candidates=20):
         """
         Real sequence-based optimization.
+        strategy: 'random' point mutants, or 'masked_marginal' / 'wt_marginal' to evaluate the
+        n_candidates best of all single substitutions under the ESM likelihood prior.
         """
-        if self.df_kinetics is None: return None
+        if self.registry is None: return None
+        if base_enzyme_id not in self.registry: return None
         
-        row = self.df_kinetics[self.df_kinetics['id'] == base_enzyme_id]
-        if row.empty: return None
-        base_seq = row.iloc[0]['sequence']
-        
-        # Optimize for missing sequence (Recursive Parent Lookup)
-        if pd.isna(base_seq) or not isinstance(base_seq, str) or len(base_seq) == 0:
-            # Try to infer parent from ID (e.g., "EGLB_ASPNG_v1_AI")
-            # Logic: Strip the suffix (_v1_AI, _v2_AI) and look up the original
-            import re
-            parent_match = re.search(r'^(.*)_v\d+_AI$', base_enzyme_id)
-            
-            if parent_match:
-                parent_id = parent_match.group(1)
-                # Look up parent
-                parent_row = self.df_kinetics[self.df_kinetics['id'] == parent_id]
-                if not parent_row.empty:
-                    base_seq = parent_row.iloc[0]['sequence']
-                    print(f"Recovered ancestry: Used parent {parent_id} sequence for {base_enzyme_id}")
-                else:
-                    # Parent also missing or not found? Crucial stop.
-                    # We cannot invent biology.
-                    return None
-            else:
-                # No clear parent pattern and no sequence. Cannot proceed scientifically.
-                return None
+        # Missing sequence (e.g. "EGLB_ASPNG_v1_AI"): use the nearest ancestor's (Recursive Parent Lookup)
+        base_seq, source_id = self.registry.resolve_sequence(base_enzyme_id)
+        if base_seq is None:
+            # No clear parent pattern, or no ancestor with a sequence. Cannot proceed scientifically.
+            # We cannot invent biology.
+            return None
+        if source_id != base_enzyme_id:
+            print(f"Recovered ancestry: Used parent {source_id} sequence for {base_enzyme_id}")
 
-        # 4. Predict Yield (Wild Type Baseline) - Calculated FIRST for comparison
-        wt_vec = self._get_embedding(base_seq)
-        dim = wt_vec.shape[0]
-        wt_feat = {f'dim_{i}': wt_vec[i] for i in range(dim)}
-        wt_feat['temp'] = temp
-        wt_feat['ph'] = ph
+        # Wild type (baseline) and all candidates in one batch: embed once, predict once
+        candidates = self._candidate_mutants(base_seq, n_candidates, strategy)
+        preds = self.evaluate_candidates([base_seq] + [c[0] for c in candidates], temp, ph, substrate)
+        wt_yield = preds[0]
+        if not candidates:
+            return None
         
-        # Determine cols
-        sub_cols = [c for c in self.feature_cols if c.startswith('sub_')]
-        for col in sub_cols:
-             t_sub = col.replace('sub_', '')
-             wt_feat[col] = 1 if substrate == t_sub else 0
-        for c in self.feature_cols:
-             if c not in wt_feat: wt_feat[c] = 0
-             
-        df_wt = pd.DataFrame([wt_feat], columns=self.feature_cols)
-        wt_yield = self.model.predict(df_wt)[0]
-
-        # Optimization Loop (Best of 20)
-        best_res = None
-        best_diff = -999.0
-        
-        for _ in range(20):
-            # 1. Mutate
-            mut_seq, mut_desc = self._mutate_sequence(base_seq)
-            
-            # 2. Embed
-            mut_vec = self._get_embedding(mut_seq)
-            
-            # 3. Predict Yield (Mutant)
-            dim = mut_vec.shape[0]
-            feat_dict = {f'dim_{i}': mut_vec[i] for i in range(dim)}
-            feat_dict['temp'] = temp
-            feat_dict['ph'] = ph
-            # Substrate
-            for col in sub_cols:
-                target_sub = col.replace('sub_', '')
-                feat_dict[col] = 1 if substrate == target_sub else 0
-                
-            # Ensure all columns
-            for c in self.feature_cols:
-                if c not in feat_dict: feat_dict[c] = 0
-                
-            df_input = pd.DataFrame([feat_dict], columns=self.feature_cols)
-            
-            pred_yield = self.model.predict(df_input)[0]
-            
-            # Compare
-            diff = pred_yield - wt_yield
-            if best_res is None or diff > best_diff:
-                best_diff = diff
-                best_res = {
-                    'mutation': mut_desc,
-                    'predicted_yield': pred_yield,
-                    'baseline_yield': wt_yield,
-                    'mechanism': 'AI Predicted Structural Improvement'
-                }
+        best = int(np.argmax(preds[1:]))
+        mut_seq, mut_desc, prior = candidates[best]
+        pred_yield = preds[1 + best]
+        best_res = {
+            'mutation': mut_desc,
+            'predicted_yield': pred_yield,
+            'baseline_yield': wt_yield,
+            'mechanism': 'AI Predicted Structural Improvement'
+        }
+        if prior is not None:
+            best_res['esm_llr'] = prior
+            best_res['mechanism'] = 'ESM Likelihood Prior + AI Predicted Structural Improvement'
         
         return best_res
 
+    def _scan_key(self, sequence, temp, ph, substrate):
+        # Invalidated by a retrained predictor (model file mtime) or another embedding model / mode
+        model_stamp = os.path.getmtime(self.model_path) if os.path.exists(self.model_path) else 0.0
+        payload = json.dumps([embedding_model_key(MODEL_NAME, self.esm_mode), sequence, float(temp), float(ph),
+                              substrate, model_stamp, list(self.feature_cols)])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+    def deep_mutational_scan(self, sequence, temp, ph, substrate="Cellulose", batch_size=512, cache_dir=DMS_CACHE_DIR):
+        """
+        Predicted yield for every single substitution of `sequence` under (temp, pH, substrate).
+
+        Mutants are evaluated in batches of ~batch_size (whole positions at a time) and written straight
+        into .npy memmaps under cache_dir, so long sequences never hold all L x 19 embeddings at once.
+        An interrupted scan resumes at the first unfinished position; a finished scan is returned from disk.
+
+        Returns:
+            dict: 'yield' and 'std' (read-only [L, 20] arrays, columns in 'amino_acids' order; wild-type cells
+                  hold the parent's prediction), 'wild_type' (yield, std), 'sequence', 'amino_acids'.
+            None if no model is loaded or the sequence is invalid.
+        """
+        if self.model is None or not is_valid_sequence(sequence):
+            return None
+
+        L = len(sequence)
+        key = self._scan_key(sequence, temp, ph, substrate)
+        os.makedirs(cache_dir, exist_ok=True)
+        yield_path = os.path.join(cache_dir, f"{key}_yield.npy")
+        std_path = os.path.join(cache_dir, f"{key}_std.npy")
+        meta_path = os.path.join(cache_dir, f"{key}.json")
+
+        meta = None
+        if os.path.exists(meta_path) and os.path.exists(yield_path) and os.path.exists(std_path):
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        if meta is None:
+            wt_yield, wt_std = self.evaluate_candidates([sequence], temp, ph, substrate, return_std=True)
+            meta = {'length': L, 'temp': temp, 'ph': ph, 'substrate': substrate, 'completed': 0,
+                    'wild_type': [float(wt_yield[0]), float(wt_std[0])]}
+            np.lib.format.open_memmap(yield_path, mode='w+', dtype=np.float32, shape=(L, len(AMINO_ACIDS)))
+            np.lib.format.open_memmap(std_path, mode='w+', dtype=np.float32, shape=(L, len(AMINO_ACIDS)))
+
+        if meta['completed'] < L:
+            yield_map = np.load(yield_path, mmap_mode='r+')
+            std_map = np.load(std_path, mmap_mode='r+')
+            positions_per_batch = max(1, batch_size // (len(AMINO_ACIDS) - 1))
+            for start in range(meta['completed'], L, positions_per_batch):
+                stop = min(start + positions_per_batch, L)
+                seqs, cells = [], []
+                for pos in range(start, stop):
+                    for j, aa in enumerate(AMINO_ACIDS):
+                        if aa == sequence[pos]:
+                            continue
+                        seqs.append(sequence[:pos] + aa + sequence[pos + 1:])
+                        cells.append((pos - start, j))
+                # Scan mutants are one-off: bypass the embedding store
+                preds, stds = self.evaluate_candidates(seqs, temp, ph, substrate, return_std=True, use_store=False)
+
+                block_yield = np.full((stop - start, len(AMINO_ACIDS)), meta['wild_type'][0], dtype=np.float32)
+                block_std = np.full((stop - start, len(AMINO_ACIDS)), meta['wild_type'][1], dtype=np.float32)
+                rows, cols = np.array(cells, dtype=int).reshape(-1, 2).T
+                block_yield[rows, cols] = preds
+                block_std[rows, cols] = stds
+                yield_map[start:stop] = block_yield
+                std_map[start:stop] = block_std
+                yield_map.flush()
+                std_map.flush()
+
+                meta['completed'] = stop
+                with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+                    json.dump(meta, f)
+                os.replace(meta_path + ".tmp", meta_path)
+            del yield_map, std_map
+
+        return {
+            'yield': np.load(yield_path, mmap_mode='r'),
+            'std': np.load(std_path, mmap_mode='r'),
+            'wild_type': tuple(meta['wild_type']),
+            'sequence': sequence,
+            'amino_acids': list(AMINO_ACIDS)
+        }
+
     def _oracle_get_yield(self, sequence, temp, ph, substrate, duration=24*3600):
         """
         Biophysical Oracle.
         1. Get True Params from Sequence (generate_ground_truth).
-        2. Run Kinetic Simulation.
+        2. Compute final product (integrated rate law, equivalent to the kinetic simulation endpoint).
         """
         from src.validation.validator import EnzymeValidator
         validator = EnzymeValidator()
         
         kcat, Km, Ki, t_opt, p_opt = generate_ground_truth(sequence)
         
-        _, res = validator.run_kinetic_simulation(
+        # Endpoint only: closed-form integrated rate law (no trajectory needed)
+        final_p = validator.calculate_final_product(
             kcat=kcat, Km=Km, substrate_conc_init=100.0, enzyme_conc=1e-5,
             duration=duration, temp=temp, ph=ph, ki=Ki, t_opt=t_opt, ph_opt=p_opt
         )
-        if res is not None:
-             final_p = res[-1, 1]
+        if np.isfinite(final_p):
              return final_p / 100.0, kcat
         return 0.0, kcat
 
-    def run_active_learning_loop(self, start_enzyme_id, temp, ph, substrate="Cellulose", rounds=5):
+    def run_active_learning_loop(self, start_enzyme_id, temp, ph, substrate="Cellulose", rounds=5,
+                                 strategy='random', n_candidates=10):
         """
         Real Active Learning Loop: Design -> Build -> Test -> Learn
+        strategy / n_candidates: candidate generation per round (see propose_optimization).
         """
         history = []
         
-        row = self.df_kinetics[self.df_kinetics['id'] == start_enzyme_id]
-        if row.empty: return []
-        current_seq = row.iloc[0]['sequence']
+        pos = self.registry.position(start_enzyme_id) if self.registry is not None else None
+        if pos is None: return []
+        current_seq = self.registry.sequences[pos]
         
         current_yield, current_kcat = self._oracle_get_yield(current_seq, temp, ph, substrate)
         
@@ -333,35 +452,11 @@ class DesignEngine:
         print(f"Starting AL Loop. Initial Yield: {current_yield:.4f}")
         
         for r in range(1, rounds + 1):
-            # 1. Design (Generate 10 mutants, predict best)
-            candidates = []
-            
-            for _ in range(10):
-                m_seq, m_desc = self._mutate_sequence(best_seq)
-                vec = self._get_embedding(m_seq)
-                
-                # Predict
-                if self.model:
-                    # Construct DF
-                    dim = vec.shape[0] # 320
-                    feat_dict = {f'dim_{i}': vec[i] for i in range(dim)}
-                    feat_dict['temp'] = temp
-                    feat_dict['ph'] = ph
-                    sub_cols = [c for c in self.feature_cols if c.startswith('sub_')]
-                    for col in sub_cols:
-                        t_sub = col.replace('sub_', '')
-                        feat_dict[col] = 1 if substrate == t_sub else 0
-                    
-                    # Fill missing
-                    for c in self.feature_cols:
-                        if c not in feat_dict: feat_dict[c] = 0
-                        
-                    df_in = pd.DataFrame([feat_dict], columns=self.feature_cols)
-                    pred = self.model.predict(df_in)[0]
-                else:
-                    pred = 0.0 # Random exploration if no model
-                
-                candidates.append((m_seq, m_desc, pred))
+            # 1. Design (Generate n_candidates mutants, predict all in one batch)
+            mutants = self._candidate_mutants(best_seq, n_candidates, strategy)
+            # Random exploration (all 0.0) if no model
+            preds = self.evaluate_candidates([m[0] for m in mutants], temp, ph, substrate)
+            candidates = [(m_seq, m_desc, pred) for (m_seq, m_desc, _), pred in zip(mutants, preds)]
             
             # Application Function: Greedy or UCB. Greedy for now.
             candidates.sort(key=lambda x: x[2], reverse=True)
@@ -0,0 +1,88 @@
+"""
+Purpose: Site-saturation scoring of point mutants with the ESM-2 language model.
+Overview: Scores every single substitution of a sequence (L x 19) by the log-likelihood ratio
+log p(mutant aa) - log p(wild-type aa) at each position, used as a zero-shot prior for which mutants to evaluate:
+    - 'masked_marginal': position i is masked and the ratio read from that pass; all L masked copies
+      run as a few padded batches.
+    - 'wt_marginal': the ratios at all positions come from one unmasked forward pass (cheapest, slightly less accurate).
+"""
+import os
+import sys
+import numpy as np
+import torch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+from data_engineering.esm_embedding import MAX_LENGTH
+
+# Same order as DesignEngine._mutate_sequence
+AMINO_ACIDS = ['A','R','N','D','C','Q','E','G','H','I','L','K','M','F','P','S','T','W','Y','V']
+STRATEGIES = ('masked_marginal', 'wt_marginal')
+
+def score_point_mutants(sequence, tokenizer, lm_model, device, strategy='masked_marginal', max_tokens_per_batch=8192):
+    """
+    Log-likelihood ratios for all point mutants.
+
+    Args:
+        lm_model: ESM-2 with its language-model head (EsmForMaskedLM), eval mode.
+    Returns:
+        np.ndarray [L, 20]: ratio per (position, AMINO_ACIDS[j]); 0 at the wild-type residue,
+        NaN beyond the model's context (MAX_LENGTH - 2 residues).
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy '{strategy}'. Use one of {STRATEGIES}.")
+    L = len(sequence)
+    n_scored = min(L, MAX_LENGTH - 2)
+    llr = np.full((L, len(AMINO_ACIDS)), np.nan)
+
+    aa_ids = torch.tensor(tokenizer.convert_tokens_to_ids(AMINO_ACIDS), device=device)
+    inputs = tokenizer(sequence, return_tensors="pt", truncation=True, max_length=MAX_LENGTH)
+    input_ids = inputs['input_ids'].to(device)
+    attention_mask = inputs['attention_mask'].to(device)
+    wt_ids = input_ids[0, 1:n_scored + 1]  # skip BOS
+    positions = torch.arange(n_scored, device=device)
+
+    with torch.no_grad():
+        if strategy == 'wt_marginal':
+            logp = torch.log_softmax(lm_model(input_ids=input_ids, attention_mask=attention_mask).logits[0], dim=-1)
+            logp = logp[1:n_scored + 1]
+            scores = logp[:, aa_ids] - logp[positions, wt_ids][:, None]
+            llr[:n_scored] = scores.float().cpu().numpy()
+        else:
+            batch_size = max(1, max_tokens_per_batch // input_ids.shape[1])
+            for start in range(0, n_scored, batch_size):
+                pos = positions[start:start + batch_size]
+                batch = input_ids.repeat(len(pos), 1)
+                batch[torch.arange(len(pos), device=device), pos + 1] = tokenizer.mask_token_id
+                logits = lm_model(input_ids=batch, attention_mask=attention_mask.repeat(len(pos), 1)).logits
+                # Row b only contributes its masked position
+                logp = torch.log_softmax(logits[torch.arange(len(pos), device=device), pos + 1], dim=-1)
+                scores = logp[:, aa_ids] - logp.gather(1, wt_ids[pos][:, None])
+                llr[start:start + len(pos)] = scores.float().cpu().numpy()
+
+    # Exactly 0 at the wild-type residue (the ratio is 0 by definition; also covers non-standard residues)
+    for i in range(n_scored):
+        if sequence[i] in AMINO_ACIDS:
+            llr[i, AMINO_ACIDS.index(sequence[i])] = 0.0
+    return llr
+
+def top_mutants(sequence, llr, k=20):
+    """
+    The k highest-scoring substitutions (wild-type residues excluded).
+
+    Returns:
+        list of (mutant_sequence, description e.g. 'A154V', score), best first.
+    """
+    scores = llr.copy()
+    for i, aa in enumerate(sequence):
+        if aa in AMINO_ACIDS:
+            scores[i, AMINO_ACIDS.index(aa)] = np.nan
+    flat = np.where(np.isnan(scores), -np.inf, scores).ravel()
+    n_valid = int(np.isfinite(flat).sum())
+    best = np.argsort(-flat, kind='stable')[:min(k, n_valid)]
+
+    out = []
+    for idx in best:
+        pos, j = divmod(int(idx), len(AMINO_ACIDS))
+        new_aa = AMINO_ACIDS[j]
+        out.append((sequence[:pos] + new_aa + sequence[pos + 1:], f"{sequence[pos]}{pos + 1}{new_aa}", float(flat[idx])))
+    return out
@@ -2,6 +2,7 @@
 import pandas as pd
 import numpy as np
 from src.ai_model.design_engine import DesignEngine
+from src.data_engineering.enzyme_registry import EnzymeRegistry
 
 class SmartSampler:
     """
@@ -12,6 +13,7 @@ class SmartSampler:
     
     def __init__(self, df_kinetics):
         self.df = df_kinetics
+        self.registry = EnzymeRegistry(df_kinetics)
         self.eg_list = self.df[self.df['id'].str.contains("EG") | self.df['id'].str.contains("Cellulase")]
         self.bg_list = self.df[self.df['id'].str.contains("BG") | self.df['id'].str.contains("Glucosidase")]
         
@@ -28,16 +30,19 @@ class SmartSampler:
         kcat/Km is the comprehensive performance metric (Specificity Constant).
         """
         try:
-            eg_row = self.df[self.df['id'] == eg_id].iloc[0]
-            bg_row = self.df[self.df['id'] == bg_id].iloc[0]
+            reg = self.registry
+            eg = reg.position(eg_id)
+            bg = reg.position(bg_id)
+            if eg is None or bg is None or not {'kcat', 'Km'} <= reg.columns:
+                return 0.5
 
             # EG: Catalytic Efficiency (kcat/Km)
             # Avoid division by zero
-            eg_efficiency = eg_row['kcat'] / max(eg_row['Km'], 0.01)
+            eg_efficiency = reg.kcat[eg] / max(reg.Km[eg], 0.01)
 
             # BG: Efficiency considering Inhibition (Ki)
-            bg_efficiency = bg_row['kcat'] / max(bg_row['Km'], 0.01)
-            bg_ki_factor = np.log1p(bg_row.get('Ki', 5.0))  # Higher Ki = Better Tolerance
+            bg_efficiency = reg.kcat[bg] / max(reg.Km[bg], 0.01)
+            bg_ki_factor = np.log1p(reg.Ki[bg] if 'Ki' in reg.columns else 5.0)  # Higher Ki = Better Tolerance
 
             # Combined Score (Log scale, EG weighted higher as rate limiting)
             combined = np.log10(eg_efficiency + 0.1) * 0.6 + \
@@ -6,15 +6,18 @@ import pandas as pd
 import numpy as np
 import os
 import joblib
+import sys
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error, r2_score
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from data_engineering.feature_store import load_feature_frame
+
 def train_yield_predictor():
     print("Training Yield Predictor AI (Phase 7)...")
     
     dataset_path = "data/processed/training_dataset.csv"
-    features_path = "data/processed/enzyme_features.csv"
     model_path = "models/yield_predictor.pkl"
     
     if not os.path.exists(dataset_path):
@@ -26,7 +29,7 @@ def train_yield_predictor():
         
     # Load Data
     df_data = pd.read_csv(dataset_path)
-    df_feat = pd.read_csv(features_path)
+    df_feat = load_feature_frame() # Binary store (falls back to enzyme_features.csv)
     
     # Merge: Add features to dataset based on 'id'
     # df_data has 2500 rows (id, temp, ph, yield)
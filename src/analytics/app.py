@@ -23,7 +23,9 @@ importlib.reload(design_engine)
 from src.ai_model.design_engine import DesignEngine
 from src.ai_model.screening import SmartSampler
 from src.data_engineering.dataset_manager import DatasetManager
+from src.data_engineering.enzyme_registry import EnzymeRegistry, variant_id
 from src.validation.validator import EnzymeValidator
+from src.validation.simulation_cache import SimulationCache
 from src.resources.materials import BIOMASS_DATA
 from src.shared.components import load_css, stats_card, section_header, vertical_spacer, CardContainer, card_begin, card_end
 
@@ -71,12 +73,19 @@ def get_static_data():
 
 df_base = get_static_data()
 
+# Simulation results shared across reruns and sessions (memory LRU + on-disk SQLite)
+@st.cache_resource
+def get_simulation_cache():
+    return SimulationCache()
+
 # Merge Static + Dynamic (Session)
 if st.session_state['generated_enzymes']:
     df_new = pd.DataFrame(st.session_state['generated_enzymes'])
     df_enz = pd.concat([df_base, df_new], ignore_index=True)
 else:
     df_enz = df_base
+# Id-indexed lookups into df_enz (instead of df_enz[df_enz['id'] == x] scans)
+registry = EnzymeRegistry(df_enz)
 
 # -------------------------------------------------------------------------
 # -------------------------------------------------------------------------
@@ -229,9 +238,9 @@ if page == "vHTS Screening":
             
             with CardContainer():
                 # Simulation Chart (Full Width)
-                validator = EnzymeValidator()
-                p_eg = df_enz[df_enz['id']==best_hit['eg_id']].iloc[0].to_dict()
-                p_bg = df_enz[df_enz['id']==best_hit['bg_id']].iloc[0].to_dict()
+                validator = EnzymeValidator(cache=get_simulation_cache())
+                p_eg = registry.record(best_hit['eg_id'])
+                p_bg = registry.record(best_hit['bg_id'])
                 
                 enz_g_L = 0.01 * load
                 total_enz_mM = (enz_g_L / 50000) * 1000 
@@ -317,7 +326,7 @@ elif page == "Inverse Design":
                 st.code(f"EG: {target['eg_id']}\nBG: {target['bg_id']}")
                 
                 # Retrieve properties
-                enz_data = df_enz[df_enz['id'] == target['eg_id']].iloc[0]
+                enz_data = registry.row(target['eg_id'])
                 
                 col_m1, col_m2 = st.columns(2)
                 with col_m1:
@@ -397,17 +406,8 @@ elif page == "Inverse Design":
                         de = DesignEngine(df_enz)
                         
                         try:
-                            wt_row = df_enz[df_enz['id'] == target['eg_id']].iloc[0]
-                            wt_seq = wt_row.get('sequence', '')
-                            
-                            if pd.isna(wt_seq) or not isinstance(wt_seq, str) or len(wt_seq) == 0:
-                                import re
-                                parent_match = re.search(r'^(.*)_v\d+_AI$', target['eg_id'])
-                                if parent_match:
-                                     parent_id = parent_match.group(1)
-                                     parent_row = df_enz[df_enz['id'] == parent_id]
-                                     if not parent_row.empty:
-                                         wt_seq = parent_row.iloc[0]['sequence']
+                            # AI variants saved without a sequence fall back to their parent's
+                            wt_seq, _ = registry.resolve_sequence(target['eg_id'])
                             
                             if not wt_seq:
                                 raise ValueError("Sequence not found")
@@ -462,27 +462,6 @@ elif page == "Process Verification":
     else:
         dt_config = st.session_state['digital_twin_config']
 
-        def find_time_to_target(t_array, G_array, target_fraction=0.8):
-            """
-            Calculates time to reach target yield (default 80% of max possible or final).
-            Here we use 80% of the FINAL WT Yield as the benchmark for fair comparison.
-            Or simply 80% of theoretical max? Let's use 80% of WT Final for now to show relative speedup to same milestone.
-            Actually, commonly it's "Time to 80% conversion".
-            We'll use 80% of current simulation's final value of WT as the target line.
-            """
-            if len(G_array) == 0: return None
-            
-            # Target is 80% of what WT achieved at 48h (or simpler: just raw conc if we knew max)
-            # Let's define target as 80% of WT's final yield.
-            # But if Mutant goes much higher, it hits this earlier.
-            final_conc = G_array[-1] # This is WT final if passed G_w
-            target_conc = final_conc * target_fraction
-
-            for i, g in enumerate(G_array):
-                if g >= target_conc:
-                    return t_array[i] / 3600  # sec -> hour
-            return None
-
         with col_l:
             vertical_spacer(5)
             section_header("Process Verification", "Pilot Scale Simulation Settings")
@@ -507,10 +486,10 @@ elif page == "Process Verification":
                 
                 if st.button("Run Simulation", type="primary", use_container_width=True):
                        with st.spinner("Simulating Parallel Reactors..."):
-                           validator = EnzymeValidator()
+                           validator = EnzymeValidator(cache=get_simulation_cache())
                            
-                           wt_eg = df_enz[df_enz['id']==dt_config['wt']['eg_id']].iloc[0].to_dict()
-                           wt_bg = df_enz[df_enz['id']==dt_config['wt']['bg_id']].iloc[0].to_dict()
+                           wt_eg = registry.record(dt_config['wt']['eg_id'])
+                           wt_bg = registry.record(dt_config['wt']['bg_id'])
                            
                            mut_eg = wt_eg.copy()
                            mut_eg['kcat'] = mut_eg['kcat'] * (1 + dt_config['mutant']['predicted_yield'])
@@ -534,14 +513,17 @@ elif page == "Process Verification":
                            # Time to 80% Calculation (Benchmarked against WT Final)
                            target_conc = G_w[-1] * 0.8
                            
-                           # Helper internal
-                           def get_time(t, G, tgt):
-                               for i, g in enumerate(G):
-                                   if g >= tgt: return t[i]/3600
-                               return None
+                           # Exact crossing time via solver event detection (sec -> hour)
+                           def get_time(params_eg, tgt):
+                               t_cross = validator.find_multienzyme_time_to_target(
+                                   params_eg, wt_bg, tgt, substrate_conc_init=conc_mM,
+                                   conc_EG=enz_conc*r_eg, conc_BG=enz_conc*(1.0-r_eg),
+                                   max_duration=48*3600
+                               )
+                               return t_cross / 3600 if t_cross is not None else None
                            
-                           time_wt_80 = get_time(t_w, G_w, target_conc)
-                           time_mut_80 = get_time(t_m, G_m, target_conc)
+                           time_wt_80 = get_time(wt_eg, target_conc)
+                           time_mut_80 = get_time(mut_eg, target_conc)
                            
                            if time_wt_80 and time_mut_80 and time_wt_80 > 0:
                                time_reduction_pct = (time_wt_80 - time_mut_80) / time_wt_80 * 100
@@ -570,16 +552,9 @@ elif page == "Process Verification":
                  def save_to_memory_callback():
                       dt_config = st.session_state['digital_twin_config']
                       base_id = dt_config['wt']['eg_id']
-                      import re
-                      v_match = re.search(r'_v(\d+)_AI$', base_id)
-                      if v_match:
-                          ver = int(v_match.group(1)) + 1
-                          root = re.sub(r'_v\d+_AI$', '', base_id)
-                          mutant_id = f"{root}_v{ver}_AI"
-                      else:
-                          mutant_id = f"{base_id}_v1_AI"
+                      mutant_id = variant_id(base_id)
                       
-                      parent_data = df_enz[df_enz['id']==dt_config['wt']['eg_id']].iloc[0].to_dict()
+                      parent_data = registry.record(dt_config['wt']['eg_id'])
                       new_entry = parent_data.copy()
                       new_entry['id'] = mutant_id
                       new_entry['kcat'] = new_entry['kcat'] * (1 + dt_config['mutant']['predicted_yield'])
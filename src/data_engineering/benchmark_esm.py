@@ -0,0 +1,66 @@
+"""
+Purpose: Accuracy / latency benchmark for the ESM-2 inference modes.
+Overview: Embeds the same enzyme sequences with each inference mode (fp32 eager, int8 dynamic quantization,
+TorchScript, torch.compile and combinations) and reports sequences per second, per-batch latency and the
+cosine similarity of pooled embeddings against the fp32 reference.
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(__file__))
+from esm_embedding import MODEL_NAME, load_esm, embed_sequences, cosine_similarity, is_valid_sequence
+
+DEFAULT_MODES = ('fp32', 'int8', 'script', 'int8+script', 'compile')
+
+def bench_mode(mode, sequences, num_threads=None, max_tokens_per_batch=8192, repeats=3):
+    """
+    Returns (embeddings, seq/s of the best repeat, load seconds). One warm-up pass is excluded from timing
+    (tracing / compilation happens there).
+    """
+    start = time.perf_counter()
+    tokenizer, model, device = load_esm(MODEL_NAME, mode=mode, num_threads=num_threads)
+    embed_sequences(sequences[:8], tokenizer, model, device, max_tokens_per_batch=max_tokens_per_batch)
+    load_seconds = time.perf_counter() - start
+
+    best = 0.0
+    for _ in range(repeats):
+        emb, stats = embed_sequences(sequences, tokenizer, model, device, max_tokens_per_batch=max_tokens_per_batch)
+        best = max(best, stats['sequences_per_second'])
+    return emb, best, load_seconds
+
+def run_benchmark(n_sequences=100, modes=DEFAULT_MODES, num_threads=None, max_tokens_per_batch=8192):
+    df = pd.read_csv("data/processed/enzyme_kinetics.csv")
+    sequences = [s for s in df['sequence'] if is_valid_sequence(s)][:n_sequences]
+    print(f"Benchmarking {len(sequences)} sequences (threads={num_threads or 'default'})...")
+
+    reference = None
+    rows = []
+    for mode in modes:
+        try:
+            emb, seq_per_s, load_s = bench_mode(mode, sequences, num_threads, max_tokens_per_batch)
+        except Exception as e:
+            print(f"  {mode:<14} unavailable: {type(e).__name__}: {e}")
+            continue
+        if reference is None:
+            # First mode is the reference (fp32 eager by default)
+            reference = emb
+        cos = cosine_similarity(reference, emb)
+        rows.append((mode, seq_per_s, load_s, float(cos.min()), float(cos.mean())))
+
+    print(f"{'Mode':<14}{'seq/s':>10}{'setup s':>10}{'cos min':>10}{'cos mean':>10}{'speedup':>10}")
+    for mode, seq_per_s, load_s, cos_min, cos_mean in rows:
+        print(f"{mode:<14}{seq_per_s:>10.1f}{load_s:>10.1f}{cos_min:>10.5f}{cos_mean:>10.5f}{seq_per_s / rows[0][1]:>9.2f}x")
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ESM-2 inference modes (accuracy vs fp32, latency).")
+    parser.add_argument("--n", type=int, default=100, help="Number of sequences")
+    parser.add_argument("--modes", nargs="+", default=list(DEFAULT_MODES))
+    parser.add_argument("--threads", type=int, default=None, help="Intra-op threads (torch.set_num_threads)")
+    parser.add_argument("--max-tokens", type=int, default=8192)
+    args = parser.parse_args()
+    run_benchmark(args.n, args.modes, args.threads, args.max_tokens)
@@ -0,0 +1,160 @@
+"""
+Purpose: Space-filling, adaptive sampling of reaction conditions for training-data generation.
+Overview: Replaces the multiplicative temp x pH x substrate grid with a fixed budget of conditions per enzyme, so the
+dataset grows linearly with the number of enzymes. Conditions are drawn from Sobol or Latin-hypercube designs over
+(temp, pH, substrate); part of the budget can be spent around each enzyme's (t_opt, ph_opt) and in regions where the
+current yield predictor (GPR) is most uncertain.
+"""
+import os
+import warnings
+import zlib
+import joblib
+import numpy as np
+import pandas as pd
+from scipy.stats import qmc
+
+from src.data_engineering.feature_store import DEFAULT_STORE_PATH, LEGACY_CSV_PATH, store_exists, load_features
+
+TEMP_RANGE = (30.0, 70.0)
+PH_RANGE = (4.0, 8.0)
+
+# Widths of the temperature / pH activity curves (EnzymeValidator.calculate_effective_kcat)
+T_WIDTH = 10.0
+PH_WIDTH = 1.5
+
+def _design(method, n, seed):
+    """
+    n points in [0, 1)^3 (temp, pH, substrate) from a scrambled Sobol or LHS design.
+    """
+    if n <= 0:
+        return np.empty((0, 3))
+    if method == 'sobol':
+        sampler = qmc.Sobol(d=3, scramble=True, seed=seed)
+        with warnings.catch_warnings():
+            # Balance properties are best for powers of 2; any budget is still space-filling
+            warnings.simplefilter('ignore', UserWarning)
+            return sampler.random(n)
+    if method == 'lhs':
+        return qmc.LatinHypercube(d=3, seed=seed).random(n)
+    raise ValueError(f"Unknown sampling method '{method}'. Use 'sobol' or 'lhs'.")
+
+def _enzyme_seed(enzyme_id, seed):
+    # Seed per enzyme id (not position) so adding enzymes does not move existing samples (keeps shards resumable)
+    return (zlib.crc32(str(enzyme_id).encode('utf-8')) ^ seed) & 0xFFFFFFFF
+
+def _scale(u, temp_box, ph_box, n_substrates):
+    temp = temp_box[0] + u[:, 0] * (temp_box[1] - temp_box[0])
+    ph = ph_box[0] + u[:, 1] * (ph_box[1] - ph_box[0])
+    sub = np.minimum((u[:, 2] * n_substrates).astype(int), n_substrates - 1)
+    # Rounded to instrument resolution; also makes keys stable in CSV shards
+    return np.round(temp, 1), np.round(ph, 2), sub
+
+def _optimum_box(opt, width, value_range):
+    """
+    opt +/- 1.5 * width clipped to value_range. An optimum outside the range is first clamped to its nearest end,
+    so the box is never inverted and stays inside the range.
+    """
+    lo, hi = value_range
+    opt = min(max(opt, lo), hi)
+    return max(lo, opt - 1.5 * width), min(hi, opt + 1.5 * width)
+
+def load_uncertainty_model(model_path="models/yield_predictor.pkl",
+                           cols_path="models/yield_predictor_cols.pkl",
+                           features_path=DEFAULT_STORE_PATH):
+    """
+    Loads (model, feature_cols, (feature_matrix, id_to_row, feature_names)) for uncertainty-guided sampling,
+    or None if unavailable.
+    """
+    has_features = store_exists(features_path) or os.path.exists(LEGACY_CSV_PATH)
+    if not (os.path.exists(model_path) and os.path.exists(cols_path) and has_features):
+        print("Warning: Yield predictor or features not found. Uncertainty-guided sampling disabled.")
+        return None
+    try:
+        model = joblib.load(model_path)
+    except Exception as e:
+        print(f"Warning: Could not load yield predictor ({e}). Uncertainty-guided sampling disabled.")
+        return None
+    if store_exists(features_path):
+        features = load_features(features_path)
+    else:
+        df_features = pd.read_csv(LEGACY_CSV_PATH)
+        names = [c for c in df_features.columns if c != 'id']
+        features = (df_features[names].to_numpy(), {eid: row for row, eid in enumerate(df_features['id'])}, names)
+    return model, joblib.load(cols_path), features
+
+def _predictive_std(predictor, enzyme_id, temp, ph, substrate_names):
+    """
+    GPR predictive std for one enzyme over candidate conditions (NaN if the enzyme has no features).
+    """
+    model, feature_cols, (feature_matrix, id_to_row, feature_names) = predictor
+    if enzyme_id not in id_to_row:
+        return np.full(len(temp), np.nan)
+
+    X = np.zeros((len(temp), len(feature_cols)))
+    feat_row = dict(zip(feature_names, feature_matrix[id_to_row[enzyme_id]]))
+    for j, col in enumerate(feature_cols):
+        if col == 'temp':
+            X[:, j] = temp
+        elif col == 'ph':
+            X[:, j] = ph
+        elif col.startswith('sub_'):
+            X[:, j] = (substrate_names == col.replace('sub_', '')).astype(float)
+        elif col in feat_row:
+            X[:, j] = feat_row[col]
+    _, std = model.predict(pd.DataFrame(X, columns=feature_cols), return_std=True)
+    return std
+
+def sample_conditions(df_enz, substrates, samples_per_enzyme=24, method='sobol',
+                      optimum_fraction=0.25, uncertainty_fraction=0.0, predictor=None,
+                      candidate_factor=8, seed=42, temp_range=TEMP_RANGE, ph_range=PH_RANGE):
+    """
+    Draws a fixed budget of (substrate, temp, pH) conditions per enzyme.
+
+    Budget split per enzyme:
+        - optimum_fraction: space-filling design inside t_opt +/- 1.5*T_WIDTH, ph_opt +/- 1.5*PH_WIDTH
+          (clipped to the global ranges; an optimum outside them is clamped first), where yields are far from zero.
+        - uncertainty_fraction: the highest GPR predictive-std points out of candidate_factor x as many
+          space-filling candidates (requires `predictor`, see load_uncertainty_model).
+        - remainder: space-filling design over the global temp/pH ranges and all substrates.
+
+    Returns:
+        (E_idx, S_idx, temp, ph) arrays, one entry per condition.
+    """
+    n_opt = int(round(samples_per_enzyme * optimum_fraction))
+    n_unc = int(round(samples_per_enzyme * uncertainty_fraction)) if predictor is not None else 0
+    n_space = max(samples_per_enzyme - n_opt - n_unc, 0)
+    n_sub = len(substrates)
+    substrate_names = np.asarray(substrates)
+
+    E_parts, S_parts, T_parts, P_parts = [], [], [], []
+    for pos, (eid, t_opt, ph_opt) in enumerate(zip(df_enz['id'], df_enz['t_opt'], df_enz['ph_opt'])):
+        rng_seed = _enzyme_seed(eid, seed)
+
+        temp, ph, sub = _scale(_design(method, n_space, rng_seed), temp_range, ph_range, n_sub)
+        temps, phs, subs = [temp], [ph], [sub]
+
+        if n_opt:
+            temp_box = _optimum_box(t_opt, T_WIDTH, temp_range)
+            ph_box = _optimum_box(ph_opt, PH_WIDTH, ph_range)
+            temp, ph, sub = _scale(_design(method, n_opt, rng_seed + 1), temp_box, ph_box, n_sub)
+            temps.append(temp); phs.append(ph); subs.append(sub)
+
+        if n_unc:
+            temp, ph, sub = _scale(_design(method, n_unc * candidate_factor, rng_seed + 2), temp_range, ph_range, n_sub)
+            std = _predictive_std(predictor, eid, temp, ph, substrate_names[sub])
+            if np.all(np.isnan(std)):
+                top = np.arange(n_unc)  # no features: fall back to the first space-filling candidates
+            else:
+                top = np.argsort(-np.nan_to_num(std, nan=-np.inf))[:n_unc]
+            temps.append(temp[top]); phs.append(ph[top]); subs.append(sub[top])
+
+        temp = np.concatenate(temps)
+        ph = np.concatenate(phs)
+        sub = np.concatenate(subs)
+        E_parts.append(np.full(len(temp), pos))
+        S_parts.append(sub)
+        T_parts.append(temp)
+        P_parts.append(ph)
+
+    return (np.concatenate(E_parts), np.concatenate(S_parts),
+            np.concatenate(T_parts), np.concatenate(P_parts))
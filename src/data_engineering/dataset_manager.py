@@ -1,10 +1,154 @@
-
 import pandas as pd
+import numpy as np
 import os
+import json
+import uuid
+import hashlib
+import threading
 from datetime import datetime
 
+from src.data_engineering.file_lock import FileLock
+
 DATA_PATH = os.path.join(os.getcwd(), 'data', 'processed', 'enzyme_kinetics.csv')
 AUGMENTED_PATH = os.path.join(os.getcwd(), 'data', 'processed', 'enzyme_kinetics_augmented.csv')
+# Feedback journal: one JSON object per line, appended under a file lock; compact() folds it into AUGMENTED_PATH
+JOURNAL_PATH = os.path.join(os.getcwd(), 'data', 'processed', 'enzyme_kinetics_feedback.jsonl')
+COMPACT_EVERY = 1000  # journal entries before augment_dataset starts a background compaction
+# Persisted md5 noise buckets per id ("<id>\t<kcat bucket>\t<Km bucket>" lines), so each id is hashed once
+NOISE_CACHE_PATH = os.path.join(os.getcwd(), 'data', 'cache', 'noise_buckets.tsv')
+NOISE_BUCKETS = 2000
+
+_noise_buckets = {}  # "<id>" -> (kcat bucket, Km bucket)
+_noise_loaded_from = set()
+
+def _hash_bucket(uid, seed_offset):
+    # md5 of "<id>_<offset>", reduced to 0 .. NOISE_BUCKETS - 1
+    return int(hashlib.md5(f"{uid}_{seed_offset}".encode()).hexdigest(), 16) % NOISE_BUCKETS
+
+def noise_buckets(ids, cache_path=NOISE_CACHE_PATH):
+    """
+    md5 noise buckets (kcat, Km) for a column of ids, as two int arrays.
+    Each distinct id is hashed at most once: results are kept in memory and appended to cache_path.
+    """
+    if cache_path and cache_path not in _noise_loaded_from and os.path.exists(cache_path):
+        with open(cache_path, encoding="utf-8") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                # Skip a line torn by an interrupted writer
+                if len(parts) == 3 and parts[1].isdigit() and parts[2].isdigit():
+                    _noise_buckets[parts[0]] = (int(parts[1]), int(parts[2]))
+    if cache_path:
+        _noise_loaded_from.add(cache_path)
+
+    codes, uniques = pd.factorize(pd.Series(ids, dtype=object), use_na_sentinel=False)
+    # Same string the hash is taken of, so ids that format alike share a bucket
+    keys = [f"{uid}" for uid in uniques]
+    new = [key for key in keys if key not in _noise_buckets]
+    for key in new:
+        _noise_buckets[key] = (_hash_bucket(key, 'k'), _hash_bucket(key, 'm'))
+    if new and cache_path:
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path, "a", encoding="utf-8") as f:
+                f.write("".join(f"{key}\t{_noise_buckets[key][0]}\t{_noise_buckets[key][1]}\n"
+                                for key in new if "\t" not in key and "\n" not in key))
+        except OSError as e:
+            print(f"Warning: could not persist noise cache: {e}")
+
+    table = np.array([_noise_buckets[key] for key in keys], dtype=np.int64).reshape(-1, 2)
+    return table[codes, 0], table[codes, 1]
+
+_base_tables = {}  # path -> ((mtime, size), raw DataFrame)
+
+def _read_base(path):
+    """
+    Raw (noise-free) base table, re-read only when the file changes.
+    """
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _base_tables.get(path)
+    if cached is None or cached[0] != signature:
+        cached = (signature, pd.read_csv(path))
+        _base_tables[path] = cached
+    return cached[1]
+
+def _json_default(value):
+    # NumPy scalars (np.float64, np.int64, ...) from DataFrame rows
+    return value.item() if hasattr(value, 'item') else str(value)
+
+GENERATION_KEY = '_journal_generation'
+
+class FeedbackJournal:
+    """
+    Append-only JSONL log of feedback entries. Appends are a single locked write + fsync, so concurrent sessions
+    never lose or interleave entries; readers only consume complete lines.
+    The first line stamps the journal with a generation id, renewed by every reset(); a reader that sees a new
+    generation starts over instead of continuing from its old offset.
+    """
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = path
+        self.lock_path = path + ".lock"
+        self._records = []
+        self._offset = 0
+        self._generation = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _header():
+        return json.dumps({GENERATION_KEY: uuid.uuid4().hex}) + "\n"
+
+    def lock(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        return FileLock(self.lock_path)
+
+    def append(self, entry):
+        line = json.dumps(entry, default=_json_default) + "\n"
+        with self.lock():
+            with open(self.path, "a", encoding="utf-8") as f:
+                if f.tell() == 0:
+                    line = self._header() + line
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def records(self):
+        """
+        All entries, reading only what was appended since the last call.
+        """
+        with self._lock:
+            try:
+                f = open(self.path, "rb")
+            except FileNotFoundError:
+                self._records, self._offset = [], 0
+                return []
+            with f:
+                first = f.readline()
+                generation = json.loads(first).get(GENERATION_KEY) if first.endswith(b"\n") else None
+                size = os.fstat(f.fileno()).st_size
+                if generation != self._generation or size < self._offset:
+                    # Reset by a compaction: start over
+                    self._records, self._offset, self._generation = [], 0, generation
+                f.seek(self._offset)
+                chunk = f.read()
+            end = chunk.rfind(b"\n") + 1
+            for line in chunk[:end].decode('utf-8').splitlines():
+                if line.strip():
+                    entry = json.loads(line)
+                    if GENERATION_KEY not in entry:
+                        self._records.append(entry)
+            self._offset += end
+            return list(self._records)
+
+    def reset(self):
+        """
+        Replaces the journal with one holding only a new generation header, so other readers start over.
+        Call with the file lock held.
+        """
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(self._header())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self.path + ".tmp", self.path)
 
 class DatasetManager:
     """
@@ -12,19 +156,42 @@ class DatasetManager:
     Implements the 'Feedback Loop' where simulation/lab results are added back.
     """
     
-    def __init__(self):
-        self.path = AUGMENTED_PATH if os.path.exists(AUGMENTED_PATH) else DATA_PATH
+    def __init__(self, journal_path=JOURNAL_PATH, compact_every=COMPACT_EVERY):
+        self.path = self._resolve_path()
+        self.journal = FeedbackJournal(journal_path)
+        self.compact_every = compact_every
+        self._compacting = threading.Lock()
         
+    @staticmethod
+    def _resolve_path():
+        # Any session's compaction may have created the augmented table since this one started
+        return AUGMENTED_PATH if os.path.exists(AUGMENTED_PATH) else DATA_PATH
+
+    def _raw_data(self):
+        """
+        Base table + journal entries not yet compacted into it, before noise.
+        """
+        self.path = self._resolve_path()
+        base = _read_base(self.path)
+        records = self.journal.records()
+        if 'feedback_id' in base.columns and records:
+            # Entries a compaction already folded in (crash between replacing the base and truncating the journal)
+            done = set(base['feedback_id'].dropna())
+            records = [r for r in records if r.get('feedback_id') not in done]
+        if not records:
+            return base.copy()
+        return pd.concat([base, pd.DataFrame(records)], ignore_index=True)
+
     def load_data(self):
         """
         Loads the enzyme dataset. 
-        Prioritizes the augmented version (with feedback data).
+        Prioritizes the augmented version (with feedback data), plus feedback still in the journal.
         Applies biological variability (noise) to prevent identical clones.
         """
-        path = self.path
+        path = self.path = self._resolve_path()
             
         if os.path.exists(path):
-            df = pd.read_csv(path)
+            df = self._raw_data()
             
             # Ensure essential columns exist
             required = ['id', 'kcat', 'Km', 'organism'] # Removed Ki as it's not always present
@@ -59,52 +226,65 @@ class DatasetManager:
         if 'kcat' not in df.columns or 'Km' not in df.columns:
             return df
             
-        def get_noise_factor(uid, seed_offset=""):
-            import hashlib
-            # Hash ID to get a float between 0.9 and 1.1
-            h = int(hashlib.md5(f"{uid}_{seed_offset}".encode()).hexdigest(), 16)
-            # Map to -0.1 to +0.1
-            norm = (h % 2000) / 10000.0 - 0.1 
-            return 1.0 + norm
-
-        # Vectorized application might be hard with custom hash string, 
-        # but dataset is small (<10k), apply is fine.
-        
-        # We use a lambda wrapper to avoid global scope issues
-        df['kcat'] = df.apply(lambda row: row['kcat'] * get_noise_factor(row['id'], 'k'), axis=1)
-        df['Km'] = df.apply(lambda row: row['Km'] * get_noise_factor(row['id'], 'm'), axis=1)
+        # Hash ID to get a float between 0.9 and 1.1 (buckets are cached per id; see noise_buckets)
+        k_buckets, m_buckets = noise_buckets(df['id'], NOISE_CACHE_PATH)
+        # Map to -0.1 to +0.1
+        df['kcat'] = df['kcat'] * (1.0 + (k_buckets / 10000.0 - 0.1))
+        df['Km'] = df['Km'] * (1.0 + (m_buckets / 10000.0 - 0.1))
         
         return df
 
     def augment_dataset(self, new_entry):
         """
-        Appends a new entry (experiment result) to the dataset.
+        Appends a new entry (experiment result) to the feedback journal.
+        Cost does not depend on the dataset size; the journal is folded into the augmented table by compact().
         
         Args:
             new_entry (dict): Dictionary containing enzyme data + result.
                               Must match schema of kinetics.csv
         """
-        df = self.load_data()
-        
+        entry = dict(new_entry)
         # Add timestamp or run_id if needed
-        new_entry['source_type'] = 'Digital_Twin_Feedback'
-        new_entry['updated_at'] = datetime.now().isoformat()
-        
-        new_df = pd.DataFrame([new_entry])
+        entry['source_type'] = 'Digital_Twin_Feedback'
+        entry['updated_at'] = datetime.now().isoformat()
+        entry['feedback_id'] = uuid.uuid4().hex
         
         # ID Handling: If ID exists, generic 'Unknown' or generate
-        if 'id' not in new_entry:
-            new_entry['id'] = f"MUT_{len(df)+1:04d}"
+        if 'id' not in entry:
+            entry['id'] = f"MUT_{entry['feedback_id'][:8]}"
             
-        updated_df = pd.concat([df, new_df], ignore_index=True)
-        
-        # Save to Augmented Path to avoid corrupting original source logic if needed
-        # But for this prototype, we treat augmented as the master if it exists
         try:
-            updated_df.to_csv(AUGMENTED_PATH, index=False)
-            print(f"Dataset augmented. New size: {len(updated_df)}")
-            self.path = AUGMENTED_PATH # Switch to augmented
-            return True
+            self.journal.append(entry)
         except Exception as e:
-            print(f"Error saving augmented data: {e}")
+            print(f"Error saving feedback entry: {e}")
             return False
+
+        n_pending = len(self.journal.records())
+        print(f"Feedback recorded ({n_pending} entries pending compaction)")
+        if self.compact_every and n_pending >= self.compact_every and self._compacting.acquire(blocking=False):
+            def run():
+                try:
+                    self.compact()
+                finally:
+                    self._compacting.release()
+            threading.Thread(target=run, daemon=True).start()
+        return True
+
+    def compact(self):
+        """
+        Folds the journal into the augmented table (written atomically), then empties the journal.
+        Returns the number of entries compacted.
+        """
+        with self.journal.lock():
+            records = self.journal.records()
+            if not records:
+                return 0
+            updated_df = self._raw_data()
+            tmp_path = AUGMENTED_PATH + ".tmp"
+            updated_df.to_csv(tmp_path, index=False)
+            os.replace(tmp_path, AUGMENTED_PATH)
+            # A crash here leaves entries in both; load_data skips them by feedback_id
+            self.journal.reset()
+            self.path = AUGMENTED_PATH # Switch to augmented
+        print(f"Dataset compacted. New size: {len(updated_df)}")
+        return len(records)
@@ -0,0 +1,303 @@
+"""
+Purpose: Streaming, multi-process ESM-2 embedding of large sequence sets.
+Overview: For catalogs too large for generate_features.py (e.g. 10^5 UniProt cellulases). The parent reads the FASTA
+or CSV once, checks that ids are unique, then streams it again and hands record k to worker k % n_workers in chunks
+through a bounded queue, so memory per worker is a few chunks and the input is parsed once however many workers run.
+The model is loaded once in the parent and its weights moved to shared memory; forked workers use them read-only.
+Each worker appends to its own shard in the output directory:
+    shard_<w>.f32      raw float32 rows [n_done, dim]
+    shard_<w>.ids.tsv  one "<id>" line per row, appended after its rows are written
+    meta.json          model, pooling, worker count and input (a restart must use the same settings)
+A restarted run skips the records each shard already holds; merge_shards() collects the shards into the feature store.
+"""
+import json
+import multiprocessing as mp
+import os
+import queue
+import sys
+import time
+import numpy as np
+import pandas as pd
+import torch
+
+sys.path.append(os.path.dirname(__file__))
+from esm_embedding import MODEL_NAME, POOLING_MODES, DEFAULT_INFERENCE_MODE, load_esm, embedding_model_key, embed_sequences
+from feature_store import DEFAULT_STORE_PATH, DTYPES, save_features
+
+DEFAULT_STREAM_DIR = os.path.join("data", "processed", "embedding_shards")
+FASTA_SUFFIXES = ('.fasta', '.fa', '.faa', '.fas')
+
+def iter_fasta(path):
+    """
+    Yields (id, sequence) from a FASTA file; the id is the first word of the header.
+    """
+    eid, parts = None, []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('>'):
+                if eid is not None:
+                    yield eid, "".join(parts)
+                eid, parts = line[1:].split()[0] if len(line) > 1 else "", []
+            elif line:
+                parts.append(line)
+    if eid is not None:
+        yield eid, "".join(parts)
+
+def iter_csv(path, id_col='id', sequence_col='sequence', chunksize=10000):
+    """
+    Yields (id, sequence) from a CSV table, reading `chunksize` rows at a time.
+    """
+    for chunk in pd.read_csv(path, usecols=[id_col, sequence_col], chunksize=chunksize,
+                             dtype={id_col: str, sequence_col: str}, keep_default_na=False):
+        yield from zip(chunk[id_col], chunk[sequence_col])
+
+def iter_records(path, **csv_kwargs):
+    if path.lower().endswith(FASTA_SUFFIXES):
+        return iter_fasta(path)
+    return iter_csv(path, **csv_kwargs)
+
+def _shard_paths(out_dir, worker):
+    return os.path.join(out_dir, f"shard_{worker:03d}.f32"), os.path.join(out_dir, f"shard_{worker:03d}.ids.tsv")
+
+def _shard_progress(out_dir, worker, dim):
+    """
+    Records already in a shard: ids with a complete row. Rows without an id line (interrupted write) are dropped,
+    and so are id lines past the end of a truncated rows file; those records are embedded again.
+    """
+    rows_path, ids_path = _shard_paths(out_dir, worker)
+    if not os.path.exists(ids_path):
+        lines = []
+    else:
+        with open(ids_path, "rb") as f:
+            data = f.read()
+        # A partial last line was never committed
+        lines = data[:data.rfind(b"\n") + 1].splitlines(keepends=True)
+    row_bytes = dim * np.dtype(np.float32).itemsize
+    n_rows = os.path.getsize(rows_path) // row_bytes if os.path.exists(rows_path) else 0
+    n_done = min(len(lines), n_rows)
+    if os.path.exists(ids_path):
+        with open(ids_path, "r+b") as f:
+            f.truncate(sum(len(line) for line in lines[:n_done]))
+    if os.path.exists(rows_path):
+        with open(rows_path, "r+b") as f:
+            f.truncate(n_done * row_bytes)
+    return n_done
+
+def _write_chunk(out_dir, worker, ids, embeddings):
+    rows_path, ids_path = _shard_paths(out_dir, worker)
+    with open(rows_path, "ab") as f:
+        f.write(np.ascontiguousarray(embeddings, dtype=np.float32).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    # Ids only after their rows are on disk: every listed id has a complete row
+    with open(ids_path, "a", encoding="utf-8") as f:
+        f.write("".join(f"{eid}\n" for eid in ids))
+        f.flush()
+        os.fsync(f.fileno())
+
+# Set by stream_embeddings before the workers fork; they inherit it instead of receiving a pickled copy
+_SHARED = {}
+
+def _embed_chunks(worker, chunks, out_dir, pooling, max_tokens_per_batch, threads, n_done):
+    """
+    Embeds (ids, sequences) chunks into the worker's shard, which already holds n_done records.
+    Returns the number of records embedded.
+    """
+    tokenizer, model, device = _SHARED['esm']
+    torch.set_num_threads(threads)
+    start = time.perf_counter()
+    n_new = 0
+    for ids, seqs in chunks:
+        embeddings, _ = embed_sequences(seqs, tokenizer, model, device, pooling=pooling,
+                                        max_tokens_per_batch=max_tokens_per_batch)
+        _write_chunk(out_dir, worker, ids, embeddings)
+        n_new += len(ids)
+        elapsed = time.perf_counter() - start
+        print(f"[worker {worker}] {n_done + n_new} sequences ({n_new / elapsed:.1f} seq/s)", flush=True)
+    return n_new
+
+def _worker(worker, tasks, results, out_dir, pooling, max_tokens_per_batch, threads, n_done):
+    """
+    Forked worker: embeds the chunks the parent puts on `tasks` until it receives None.
+    """
+    chunks = iter(tasks.get, None)
+    results.put((worker, _embed_chunks(worker, chunks, out_dir, pooling, max_tokens_per_batch, threads, n_done)))
+
+def _check_unique(input_path, csv_kwargs):
+    """
+    Raises ValueError on a repeated id, before anything is embedded (shards are keyed by id).
+    """
+    seen = set()
+    for eid, _ in iter_records(input_path, **csv_kwargs):
+        if eid in seen:
+            raise ValueError(f"Duplicate id '{eid}' in {input_path}; ids must be unique")
+        seen.add(eid)
+
+def _assign_chunks(input_path, csv_kwargs, n_workers, chunk_size, n_done):
+    """
+    Single pass over the input: yields (worker, (ids, sequences)) chunks, record k going to worker k % n_workers
+    and skipping the first n_done[w] records of each worker (already in its shard).
+    """
+    pending = [([], []) for _ in range(n_workers)]
+    seen = [0] * n_workers
+    for k, (eid, seq) in enumerate(iter_records(input_path, **csv_kwargs)):
+        w = k % n_workers
+        seen[w] += 1
+        if seen[w] <= n_done[w]:
+            continue
+        ids, seqs = pending[w]
+        ids.append(eid)
+        seqs.append(seq)
+        if len(ids) >= chunk_size:
+            yield w, pending[w]
+            pending[w] = ([], [])
+    for w, chunk in enumerate(pending):
+        if chunk[0]:
+            yield w, chunk
+
+def _put(tasks, item, proc):
+    # A bounded put that gives up if the worker has died instead of blocking forever
+    while True:
+        try:
+            tasks.put(item, timeout=1.0)
+            return
+        except queue.Full:
+            if not proc.is_alive():
+                raise RuntimeError(f"Embedding worker {proc.name} exited with code {proc.exitcode}")
+
+def _check_meta(out_dir, meta):
+    meta_path = os.path.join(out_dir, "meta.json")
+    if os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as f:
+            existing = json.load(f)
+        changed = [k for k in meta if existing.get(k) != meta[k]]
+        if changed:
+            raise ValueError(f"{out_dir} holds a run with different {changed}; use a new output directory")
+    else:
+        os.makedirs(out_dir, exist_ok=True)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+def stream_embeddings(input_path, out_dir=DEFAULT_STREAM_DIR, n_workers=None, pooling='mean', chunk_size=512,
+                      max_tokens_per_batch=8192, mode=DEFAULT_INFERENCE_MODE, model_name=MODEL_NAME,
+                      id_col='id', sequence_col='sequence'):
+    """
+    Embeds every record of a FASTA/CSV file into per-worker shards under out_dir (restartable).
+
+    Args:
+        n_workers (int): Worker processes (default: CPU count). Each gets cpu_count // n_workers intra-op threads.
+        chunk_size (int): Sequences embedded and written per step; bounds memory per worker.
+    Returns:
+        int: Records embedded by this run (0 when the shards were already complete).
+    """
+    if pooling not in POOLING_MODES:
+        raise ValueError(f"Unknown pooling '{pooling}'. Use one of {POOLING_MODES}.")
+    n_workers = n_workers or os.cpu_count() or 1
+    csv_kwargs = {} if input_path.lower().endswith(FASTA_SUFFIXES) else {'id_col': id_col, 'sequence_col': sequence_col}
+    _check_unique(input_path, csv_kwargs)
+
+    # One copy of the weights: loaded here, shared with the forked workers
+    tokenizer, model, device = load_esm(model_name, device=torch.device('cpu'), mode=mode)
+    if hasattr(model, 'share_memory'):
+        model.share_memory()
+    _SHARED['esm'] = (tokenizer, model, device)
+    _check_meta(out_dir, {
+        'model': embedding_model_key(model_name, mode),
+        'pooling': pooling,
+        'dim': model.config.hidden_size,
+        'n_workers': n_workers,
+        'input': os.path.abspath(input_path)
+    })
+
+    dim = model.config.hidden_size
+    n_done = [_shard_progress(out_dir, w, dim) for w in range(n_workers)]
+    threads = max(1, (os.cpu_count() or 1) // n_workers)
+    chunks = _assign_chunks(input_path, csv_kwargs, n_workers, chunk_size, n_done)
+
+    start = time.perf_counter()
+    if n_workers == 1:
+        counts = [_embed_chunks(0, (chunk for _, chunk in chunks), out_dir, pooling, max_tokens_per_batch,
+                                threads, n_done[0])]
+    else:
+        ctx = mp.get_context('fork')
+        tasks = [ctx.Queue(maxsize=2) for _ in range(n_workers)]
+        results = ctx.Queue()
+        procs = [ctx.Process(target=_worker, name=f"embed-{w}",
+                             args=(w, tasks[w], results, out_dir, pooling, max_tokens_per_batch, threads, n_done[w]))
+                 for w in range(n_workers)]
+        for proc in procs:
+            proc.start()
+        try:
+            for w, chunk in chunks:
+                _put(tasks[w], chunk, procs[w])
+            for w in range(n_workers):
+                _put(tasks[w], None, procs[w])
+            counts = [None] * n_workers
+            while None in counts:
+                try:
+                    w, n = results.get(timeout=1.0)
+                    counts[w] = n
+                except queue.Empty:
+                    failed = [p for w, p in enumerate(procs) if counts[w] is None and p.exitcode not in (None, 0)]
+                    if failed:
+                        raise RuntimeError(f"Embedding worker {failed[0].name} exited with code {failed[0].exitcode}")
+        except BaseException:
+            for proc in procs:
+                proc.terminate()
+            raise
+        finally:
+            for proc in procs:
+                proc.join()
+    elapsed = time.perf_counter() - start
+    print(f"Embedded {sum(counts)} new sequences with {n_workers} workers in {elapsed:.1f} s")
+    return sum(counts)
+
+def load_shards(out_dir=DEFAULT_STREAM_DIR):
+    """
+    Returns (ids, embeddings [n, dim] float32) from all shards, grouped by worker.
+    """
+    with open(os.path.join(out_dir, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    all_ids, parts = [], []
+    for w in range(meta['n_workers']):
+        rows_path, ids_path = _shard_paths(out_dir, w)
+        if not os.path.exists(ids_path):
+            continue
+        with open(ids_path, encoding="utf-8") as f:
+            ids = f.read().splitlines()
+        rows = np.fromfile(rows_path, dtype=np.float32, count=len(ids) * meta['dim'])
+        all_ids.extend(ids)
+        parts.append(rows.reshape(len(ids), meta['dim']))
+    return all_ids, (np.concatenate(parts) if parts else np.zeros((0, meta['dim']), dtype=np.float32))
+
+def merge_shards(out_dir=DEFAULT_STREAM_DIR, path=DEFAULT_STORE_PATH, dtype='float32'):
+    """
+    Writes all shards into the binary feature store. Returns the number of enzymes.
+    """
+    ids, embeddings = load_shards(out_dir)
+    save_features(ids, embeddings, path=path, dtype=dtype)
+    return len(ids)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Streaming multi-process ESM-2 embedding of a FASTA/CSV file.")
+    parser.add_argument("input", help="FASTA (.fasta/.fa/.faa) or CSV with id and sequence columns")
+    parser.add_argument("--out", default=DEFAULT_STREAM_DIR, help="Shard directory (re-run to resume)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--pooling", choices=POOLING_MODES, default='mean')
+    parser.add_argument("--chunk-size", type=int, default=512)
+    parser.add_argument("--max-tokens", type=int, default=8192, help="Padded tokens per batch")
+    parser.add_argument("--mode", default=DEFAULT_INFERENCE_MODE)
+    parser.add_argument("--id-col", default='id')
+    parser.add_argument("--sequence-col", default='sequence')
+    parser.add_argument("--merge", default=None, metavar="STORE_PATH",
+                        help="Afterwards, write all shards to this feature store path (e.g. data/processed/enzyme_features)")
+    parser.add_argument("--dtype", choices=DTYPES, default='float32')
+    args = parser.parse_args()
+    stream_embeddings(args.input, args.out, n_workers=args.workers, pooling=args.pooling, chunk_size=args.chunk_size,
+                      max_tokens_per_batch=args.max_tokens, mode=args.mode,
+                      id_col=args.id_col, sequence_col=args.sequence_col)
+    if args.merge:
+        n = merge_shards(args.out, args.merge, args.dtype)
+        print(f"Merged {n} enzymes into {args.merge}.npy")
@@ -0,0 +1,171 @@
+"""
+Purpose: Persistent store for pooled sequence embeddings.
+Overview: Embeddings are keyed by sha256(model name, pooling mode, sequence), so the offline feature generator and the
+Design Engine share one store and ESM never runs twice for a sequence it has already seen.
+On disk (append-only, safe to share between processes):
+    vectors.f32   raw float32 rows, read through a NumPy memmap
+    index.tsv     one "<key>\t<row>" line per stored vector, appended after its row is written
+    meta.json     vector dimension
+"""
+import hashlib
+import json
+import os
+import threading
+import sys
+import numpy as np
+
+sys.path.append(os.path.dirname(__file__))
+from file_lock import FileLock
+
+DEFAULT_CACHE_DIR = os.path.join("data", "cache", "embeddings")
+
+class EmbeddingCache:
+    def __init__(self, model_name, pooling='mean', path=DEFAULT_CACHE_DIR):
+        """
+        Args:
+            model_name (str): Embedding model identifier (part of the key).
+            pooling (str): Pooling mode (part of the key).
+            path (str): Directory holding the store files.
+        """
+        self.model_name = model_name
+        self.pooling = pooling
+        self.path = path
+        self.vectors_path = os.path.join(path, "vectors.f32")
+        self.index_path = os.path.join(path, "index.tsv")
+        self.meta_path = os.path.join(path, "meta.json")
+        self.lock_path = os.path.join(path, ".lock")
+
+        self.dim = None
+        self._index = {}
+        self._index_offset = 0
+        self._vectors = None
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'writes': 0}
+
+        os.makedirs(path, exist_ok=True)
+        self._load_meta()
+
+    def make_key(self, sequence):
+        payload = f"{self.model_name}\n{self.pooling}\n{sequence}"
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _load_meta(self):
+        if self.dim is None and os.path.exists(self.meta_path):
+            with open(self.meta_path, encoding="utf-8") as f:
+                self.dim = json.load(f)['dim']
+
+    def _file_lock(self):
+        return FileLock(self.lock_path)
+
+    def _refresh(self):
+        """
+        Picks up rows appended since the last read (by this or another process).
+        """
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_offset)
+            chunk = f.read()
+        # Only consume complete lines; a concurrent writer may be mid-line
+        end = chunk.rfind(b"\n") + 1
+        for line in chunk[:end].decode('utf-8').splitlines():
+            key, row = line.split("\t")
+            self._index[key] = int(row)
+        self._index_offset += end
+
+        # The store may have been empty when this instance was created; another process has since written meta
+        self._load_meta()
+        n_rows = max(self._index.values()) + 1 if self._index else 0
+        if n_rows and (self._vectors is None or self._vectors.shape[0] < n_rows):
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(n_rows, self.dim))
+
+    def get_many(self, sequences):
+        """
+        Returns (embeddings [n, dim] with zero rows for misses, boolean found mask).
+        """
+        keys = [self.make_key(s) for s in sequences]
+        with self._lock:
+            if any(k not in self._index for k in keys):
+                self._refresh()
+            rows = np.array([self._index.get(k, -1) for k in keys], dtype=int)
+            found = rows >= 0
+            out = np.zeros((len(keys), self.dim or 0), dtype=np.float32)
+            if found.any():
+                out[found] = self._vectors[rows[found]]
+            self._stats['hits'] += int(found.sum())
+            self._stats['misses'] += int((~found).sum())
+        return out, found
+
+    def get(self, sequence):
+        """
+        Cached embedding for one sequence, or None on a miss.
+        """
+        out, found = self.get_many([sequence])
+        return out[0] if found[0] else None
+
+    def put_many(self, sequences, embeddings):
+        """
+        Appends embeddings for sequences not yet in the store.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if embeddings.ndim != 2 or embeddings.shape[0] != len(sequences):
+            raise ValueError("embeddings must have shape [len(sequences), dim]")
+
+        with self._lock, self._file_lock():
+            self._refresh()
+            if self.dim is None:
+                self.dim = int(embeddings.shape[1])
+                with open(self.meta_path, "w", encoding="utf-8") as f:
+                    json.dump({'dim': self.dim}, f)
+            elif embeddings.shape[1] != self.dim:
+                raise ValueError(f"Embedding dim {embeddings.shape[1]} does not match store dim {self.dim}")
+
+            new = {}
+            for seq, vec in zip(sequences, embeddings):
+                key = self.make_key(seq)
+                if key not in self._index and key not in new:
+                    new[key] = vec
+            if not new:
+                return
+
+            row_bytes = self.dim * np.dtype(np.float32).itemsize
+            with open(self.vectors_path, "ab") as f:
+                # Drop a partial row left by an interrupted writer (its index line was never written)
+                first_row = f.tell() // row_bytes
+                f.truncate(first_row * row_bytes)
+                f.write(np.stack(list(new.values())).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            # Index lines only after their rows are on disk: an indexed row is always complete
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write("".join(f"{key}\t{first_row + i}\n" for i, key in enumerate(new)))
+            self._refresh()
+            self._stats['writes'] += len(new)
+
+    def put(self, sequence, embedding):
+        self.put_many([sequence], np.asarray(embedding)[None, :])
+
+    def embed(self, sequences, compute):
+        """
+        Embeddings for all sequences: cache hits are read from the store, misses are computed
+        in one call compute(missing_sequences) -> [n_missing, dim] and stored.
+        """
+        sequences = list(sequences)
+        out, found = self.get_many(sequences)
+        missing = np.flatnonzero(~found)
+        if len(missing):
+            computed = np.asarray(compute([sequences[i] for i in missing]), dtype=np.float32)
+            if self.dim is None:
+                # Empty store: nothing was found, size the output from the computed vectors
+                out = np.zeros((len(sequences), computed.shape[1]), dtype=np.float32)
+            out[missing] = computed
+            self.put_many([sequences[i] for i in missing], computed)
+        return out
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._index)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,130 @@
+"""
+Purpose: Indexed access to the enzyme kinetics table.
+Overview: Wraps the kinetics DataFrame with a hash index on 'id' (first row wins, like df[df['id'] == x].iloc[0]),
+so lookups are O(1) instead of a boolean scan over the whole table. Kinetic parameters are also exposed as NumPy
+arrays by row position, and AI variants ("<root>_v<N>_AI", see variant_id) resolve to their parent's sequence.
+"""
+import re
+import numpy as np
+import pandas as pd
+
+KINETIC_PARAMS = ('kcat', 'Km', 'Ki', 't_opt', 'ph_opt')
+VARIANT_PATTERN = re.compile(r'^(.*)_v(\d+)_AI$')
+
+def parent_id(enzyme_id):
+    """
+    Root enzyme of an AI variant ('EGLB_ASPNG_v2_AI' -> 'EGLB_ASPNG'), or None for a non-variant id.
+    """
+    match = VARIANT_PATTERN.search(str(enzyme_id))
+    return match.group(1) if match else None
+
+def variant_id(base_id):
+    """
+    Id for the next AI variant of base_id: '<root>_v1_AI' for a natural enzyme, '<root>_v<N+1>_AI' for variant N.
+    """
+    match = VARIANT_PATTERN.search(str(base_id))
+    if match:
+        return f"{match.group(1)}_v{int(match.group(2)) + 1}_AI"
+    return f"{base_id}_v1_AI"
+
+def _has_sequence(seq):
+    return isinstance(seq, str) and len(seq) > 0
+
+class EnzymeRegistry:
+    def __init__(self, df):
+        """
+        Args:
+            df (pd.DataFrame): Kinetics table with an 'id' column (e.g. enzyme_kinetics.csv).
+        """
+        self.df = df
+        self.ids = df['id'].tolist()
+        self._index = {}
+        for pos, eid in enumerate(self.ids):
+            self._index.setdefault(eid, pos)
+        self.columns = set(df.columns)
+
+        # Array-backed parameters by row position (NaN where the column is missing)
+        self.params = {}
+        for name in KINETIC_PARAMS:
+            if name in df.columns:
+                self.params[name] = pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=np.float64)
+            else:
+                self.params[name] = np.full(len(df), np.nan)
+        self.kcat = self.params['kcat']
+        self.Km = self.params['Km']
+        self.Ki = self.params['Ki']
+        self.t_opt = self.params['t_opt']
+        self.ph_opt = self.params['ph_opt']
+        self.sequences = df['sequence'].tolist() if 'sequence' in df.columns else [None] * len(df)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, enzyme_id):
+        return enzyme_id in self._index
+
+    def position(self, enzyme_id):
+        """
+        Row position of enzyme_id, or None.
+        """
+        return self._index.get(enzyme_id)
+
+    def positions(self, ids):
+        """
+        Row positions [n] for a list of ids; -1 where an id is unknown.
+        """
+        return np.array([self._index.get(eid, -1) for eid in ids], dtype=np.int64)
+
+    def row(self, enzyme_id):
+        """
+        Table row as a Series, or None.
+        """
+        pos = self._index.get(enzyme_id)
+        return None if pos is None else self.df.iloc[pos]
+
+    def record(self, enzyme_id):
+        """
+        Table row as a dict, or None.
+        """
+        row = self.row(enzyme_id)
+        return None if row is None else row.to_dict()
+
+    def get_many(self, ids):
+        """
+        Rows for a list of ids, in input order; unknown ids are skipped.
+        """
+        pos = self.positions(ids)
+        return self.df.iloc[pos[pos >= 0]]
+
+    def param(self, name, enzyme_id, default=None):
+        """
+        One kinetic parameter of one enzyme; default when the enzyme or the column is missing.
+        """
+        pos = self._index.get(enzyme_id)
+        if pos is None or name not in self.columns:
+            return default
+        return self.params[name][pos]
+
+    def lineage(self, enzyme_id):
+        """
+        enzyme_id followed by its parent chain ('X_v2_AI' -> ['X_v2_AI', 'X']).
+        """
+        chain = [enzyme_id]
+        parent = parent_id(enzyme_id)
+        while parent is not None and parent not in chain:
+            chain.append(parent)
+            parent = parent_id(parent)
+        return chain
+
+    def resolve_sequence(self, enzyme_id):
+        """
+        Sequence of enzyme_id, or for an AI variant saved without one, the sequence of its nearest ancestor.
+
+        Returns:
+            (sequence, id it was taken from), or (None, None) if no enzyme in the lineage has one.
+        """
+        for eid in self.lineage(enzyme_id):
+            pos = self._index.get(eid)
+            if pos is not None and _has_sequence(self.sequences[pos]):
+                return self.sequences[pos], eid
+        return None, None
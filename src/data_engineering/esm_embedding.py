@@ -0,0 +1,388 @@
+"""
+Purpose: Batched ESM-2 sequence embeddings.
+Overview: Shared by the offline feature generator and the Design Engine. Sequences are sorted by length and grouped
+into buckets bounded by a padded-token budget, so each forward pass works on a full (batch x length) matrix with little
+padding. Mean pooling uses the attention mask, so padding never leaks into an embedding.
+Sequences longer than the model context can be embedded with overlapping windows (WindowedEmbedder) instead of
+being truncated. Optional CPU inference modes: dynamic int8 quantization of the Linear layers, TorchScript tracing and torch.compile
+(see benchmark_esm.py for accuracy against fp32 and latency).
+"""
+import os
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+import torch
+from transformers import EsmTokenizer, EsmModel, EsmForMaskedLM
+
+MODEL_NAME = "facebook/esm2_t6_8M_UR50D"
+EMBEDDING_DIM = 320
+MAX_LENGTH = 1024  # Tokens, including BOS/EOS
+WINDOW_RESIDUES = MAX_LENGTH - 2
+WINDOW_STRIDE = WINDOW_RESIDUES // 2
+MIN_SEQUENCE_LENGTH = 5
+
+# 'mean': all tokens incl. BOS/EOS (the pooling enzyme_features.csv and the trained predictor were built with)
+# 'residue_mean': residue tokens only
+POOLING_MODES = ('mean', 'residue_mean')
+
+# Inference modes: 'fp32' (eager), or '+'-joined options: 'int8' (dynamic quantization, CPU only)
+# with at most one of 'script' (TorchScript trace) / 'compile' (torch.compile), e.g. 'int8+script'
+INFERENCE_OPTIONS = ('int8', 'script', 'compile')
+DEFAULT_INFERENCE_MODE = os.environ.get("ESM_INFERENCE_MODE", "fp32")
+DEFAULT_NUM_THREADS = int(os.environ["ESM_NUM_THREADS"]) if os.environ.get("ESM_NUM_THREADS") else None
+
+def parse_inference_mode(mode):
+    if mode in (None, 'fp32'):
+        return set()
+    options = set(mode.split('+'))
+    unknown = options - set(INFERENCE_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown inference option(s) {sorted(unknown)}. Use 'fp32' or a '+'-join of {INFERENCE_OPTIONS}.")
+    if {'script', 'compile'} <= options:
+        raise ValueError("Use either 'script' or 'compile', not both.")
+    return options
+
+def set_threads(num_threads=None, num_interop_threads=None):
+    """
+    Explicit intra-op (and inter-op) thread counts for CPU inference.
+    """
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    if num_interop_threads:
+        try:
+            torch.set_num_interop_threads(num_interop_threads)
+        except RuntimeError:
+            # Can only be set before the first parallel op of the process
+            print("Warning: inter-op threads already initialized; keeping the current setting.")
+
+class _HiddenStates(torch.nn.Module):
+    """
+    Tensor-only view of an EsmModel (input_ids, attention_mask) -> last_hidden_state, for tracing.
+    """
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+
+class _TracedEsm(torch.nn.Module):
+    """
+    TorchScript-traced encoder behind the EsmModel call interface used here (model(**inputs).last_hidden_state).
+    """
+    def __init__(self, traced, config):
+        super().__init__()
+        self.traced = traced
+        self.config = config
+
+    def forward(self, input_ids, attention_mask):
+        return SimpleNamespace(last_hidden_state=self.traced(input_ids, attention_mask))
+
+def optimize_esm(model, tokenizer, device, mode='fp32'):
+    """
+    Applies the inference mode to an eval-mode EsmModel.
+    """
+    options = parse_inference_mode(mode)
+    if 'int8' in options:
+        if device.type != 'cpu':
+            raise ValueError("Dynamic int8 quantization runs on CPU only.")
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if 'script' in options:
+        # Traced with a padded 2-sequence batch; the graph is shape-generic over batch size and length
+        example = tokenizer(["MKTAYIAKQR", "MKTAY"], return_tensors="pt", padding=True)
+        example = (example['input_ids'].to(device), example['attention_mask'].to(device))
+        with torch.no_grad():
+            traced = torch.jit.trace(_HiddenStates(model).eval(), example, strict=False)
+        model = _TracedEsm(torch.jit.freeze(traced) if device.type == 'cpu' else traced, model.config)
+    if 'compile' in options:
+        # The compiled wrapper forwards attribute access (e.g. .config) to the original module
+        model = torch.compile(model, dynamic=True)
+    return model
+
+def load_esm(model_name=MODEL_NAME, device=None, mode='fp32', num_threads=None):
+    """
+    Returns (tokenizer, model, device) with the model in eval mode on `device` (CUDA if available),
+    optimized for the given inference mode (see INFERENCE_OPTIONS).
+    """
+    options = parse_inference_mode(mode)
+    if device is None:
+        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    device = torch.device(device)  # also accepts 'cpu', 'cuda:0', ...
+    if 'int8' in options and device.type != 'cpu':
+        print("Dynamic int8 quantization is CPU-only: running ESM-2 on CPU.")
+        device = torch.device("cpu")
+    set_threads(num_threads)
+    tokenizer = EsmTokenizer.from_pretrained(model_name)
+    model = EsmModel.from_pretrained(model_name).to(device)
+    model.eval()
+    return tokenizer, optimize_esm(model, tokenizer, device, mode), device
+
+def load_esm_lm(model_name=MODEL_NAME, device=None):
+    """
+    ESM-2 with its masked-language-model head (for mutant likelihood scoring). Returns (tokenizer, model, device).
+    """
+    if device is None:
+        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    tokenizer = EsmTokenizer.from_pretrained(model_name)
+    model = EsmForMaskedLM.from_pretrained(model_name).to(device)
+    model.eval()
+    return tokenizer, model, device
+
+def embedding_model_key(model_name=MODEL_NAME, mode='fp32'):
+    """
+    Model identifier for the embedding store: quantized embeddings differ slightly from fp32 and are kept apart.
+    Tracing / compilation do not change the numerics.
+    """
+    return f"{model_name}+int8" if 'int8' in parse_inference_mode(mode) else model_name
+
+def cosine_similarity(a, b):
+    """
+    Row-wise cosine similarity of two [n, dim] arrays.
+    """
+    num = np.sum(a * b, axis=1)
+    den = np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+    return num / np.maximum(den, 1e-12)
+
+def is_valid_sequence(seq):
+    return isinstance(seq, str) and len(seq) >= MIN_SEQUENCE_LENGTH
+
+def length_buckets(lengths, max_tokens_per_batch=8192, max_batch_size=256):
+    """
+    Groups sequence indices into batches of similar length.
+    Sequences are sorted by length; a batch grows while batch_size x longest tokenized length
+    (the padded size of the batch) stays within max_tokens_per_batch.
+
+    Returns:
+        list of np.ndarray: Index arrays into `lengths`, one per batch.
+    """
+    lengths = np.asarray(lengths)
+    order = np.argsort(lengths, kind='stable')
+    batches = []
+    start = 0
+    for k in range(1, len(order)):
+        # Sorted by length: sequence k is the longest of a batch order[start:k + 1]
+        padded_tokens = (k - start + 1) * min(lengths[order[k]] + 2, MAX_LENGTH)
+        if padded_tokens > max_tokens_per_batch or k - start >= max_batch_size:
+            batches.append(order[start:k])
+            start = k
+    if len(order):
+        batches.append(order[start:])
+    return batches
+
+def mean_pool(hidden, attention_mask, pooling='mean'):
+    """
+    Mean over the token axis of hidden states [batch, len, dim], ignoring padding.
+    With pooling='residue_mean' the BOS (first) and EOS (last unpadded) tokens are excluded as well.
+    """
+    if pooling not in POOLING_MODES:
+        raise ValueError(f"Unknown pooling '{pooling}'. Use one of {POOLING_MODES}.")
+    mask = attention_mask.to(hidden.dtype).clone()
+    if pooling == 'residue_mean':
+        last = attention_mask.sum(dim=1) - 1
+        mask[:, 0] = 0
+        mask[torch.arange(mask.shape[0], device=mask.device), last] = 0
+    summed = (hidden * mask.unsqueeze(-1)).sum(dim=1)
+    return summed / mask.sum(dim=1, keepdim=True).clamp(min=1)
+
+def window_spans(length, window=WINDOW_RESIDUES, stride=WINDOW_STRIDE):
+    """
+    Overlapping [start, stop) residue windows covering a sequence; the last window ends at the sequence end.
+    """
+    if length <= window:
+        return [(0, length)]
+    starts = list(range(0, length - window, stride)) + [length - window]
+    return [(a, a + window) for a in starts]
+
+def _owned_ranges(spans):
+    """
+    Splits the residues between overlapping windows (boundary in the middle of each overlap), so every
+    residue is pooled exactly once, from the window where it has the most context on both sides.
+    """
+    bounds = [spans[0][0]] + [(spans[i + 1][0] + spans[i][1]) // 2 for i in range(len(spans) - 1)] + [spans[-1][1]]
+    return [(bounds[i], bounds[i + 1]) for i in range(len(spans))]
+
+class WindowedEmbedder:
+    """
+    Pooled embeddings of sequences longer than the model context, from overlapping windows.
+
+    Each window contributes the sum of hidden states over the residues it owns (plus BOS / EOS of the first / last
+    window for pooling='mean'); the pooled vector is the total over windows divided by the token count.
+    Windows run as fixed-length batches, so memory is bounded by the window size. Recent window contributions are
+    kept by (sequence length, window index, window residues), so a point mutant of a seen parent (or of another
+    mutant in the same call) recomputes only the windows containing the mutation.
+    """
+    def __init__(self, tokenizer, model, device, pooling='mean', window=WINDOW_RESIDUES, stride=WINDOW_STRIDE,
+                 max_tokens_per_batch=8192, max_cached_windows=1024):
+        if pooling not in POOLING_MODES:
+            raise ValueError(f"Unknown pooling '{pooling}'. Use one of {POOLING_MODES}.")
+        self.tokenizer = tokenizer
+        self.model = model
+        self.device = device
+        self.pooling = pooling
+        self.window = window
+        self.stride = stride
+        self.max_tokens_per_batch = max_tokens_per_batch
+        self.max_cached_windows = max_cached_windows
+        self._windows = OrderedDict()  # (length, window index, residues) -> contribution
+        self.windows_computed = 0
+        self.windows_reused = 0
+
+    def _contributions(self, jobs, keep_residues=False):
+        """
+        jobs: list of (sequence, window index, spans). Returns [len(jobs), dim] window contributions
+        (and, with keep_residues, the hidden states of the residues each window owns).
+        """
+        dim = self.model.config.hidden_size
+        out = np.zeros((len(jobs), dim), dtype=np.float32)
+        residues = [None] * len(jobs)
+        batch_size = max(1, self.max_tokens_per_batch // (self.window + 2))
+        with torch.no_grad():
+            for start in range(0, len(jobs), batch_size):
+                batch = jobs[start:start + batch_size]
+                chunks = [seq[spans[i][0]:spans[i][1]] for seq, i, spans in batch]
+                inputs = self.tokenizer(chunks, return_tensors="pt", padding=True)
+                inputs = {k: v.to(self.device) for k, v in inputs.items()}
+                hidden = self.model(**inputs).last_hidden_state.float()
+                for b, (seq, i, spans) in enumerate(batch):
+                    a, _ = spans[i]
+                    o0, o1 = _owned_ranges(spans)[i]
+                    # Token t of the chunk is residue a + t - 1 (token 0 is BOS)
+                    owned = hidden[b, 1 + o0 - a:1 + o1 - a]
+                    if keep_residues:
+                        residues[start + b] = owned.cpu().numpy()
+                    vec = owned.sum(dim=0)
+                    if self.pooling == 'mean':
+                        n_tok = int(inputs['attention_mask'][b].sum())
+                        if i == 0:
+                            vec = vec + hidden[b, 0]
+                        if i == len(spans) - 1:
+                            vec = vec + hidden[b, n_tok - 1]
+                    out[start + b] = vec.cpu().numpy()
+        return (out, residues) if keep_residues else out
+
+    def embed_many(self, sequences, residue_sink=None):
+        """
+        Pooled embeddings [n, dim]; all windows that need computing run as shared batches.
+        With residue_sink, residue_sink(k, states [len, dim]) receives the per-residue hidden states of
+        sequences[k], each residue taken from the window that owns it (cached windows are recomputed).
+        """
+        sequences = list(sequences)
+        plans = []
+        jobs = {}  # window key -> position in the job list
+        job_list = []
+        for seq in sequences:
+            spans = window_spans(len(seq), self.window, self.stride)
+            plan = []
+            for i, (a, b) in enumerate(spans):
+                key = (len(seq), i, seq[a:b])
+                if key in self._windows and residue_sink is None:
+                    self.windows_reused += 1
+                elif key in jobs:
+                    self.windows_reused += 1
+                else:
+                    jobs[key] = len(job_list)
+                    job_list.append((seq, i, spans))
+                plan.append(key)
+            plans.append(plan)
+
+        computed, residues = None, None
+        if job_list and residue_sink is not None:
+            computed, residues = self._contributions(job_list, keep_residues=True)
+        elif job_list:
+            computed = self._contributions(job_list)
+        self.windows_computed += len(job_list)
+
+        dim = self.model.config.hidden_size
+        out = np.zeros((len(sequences), dim), dtype=np.float32)
+        for k, (seq, plan) in enumerate(zip(sequences, plans)):
+            total = np.zeros(dim, dtype=np.float64)
+            for key in plan:
+                total += self._windows[key] if key in self._windows else computed[jobs[key]]
+            n_tokens = len(seq) + (2 if self.pooling == 'mean' else 0)
+            out[k] = total / n_tokens
+            if residue_sink is not None:
+                residue_sink(k, np.concatenate([residues[jobs[key]] for key in plan]))
+
+        for key, j in jobs.items():
+            self._windows[key] = computed[j]
+        for key in {key for plan in plans for key in plan}:
+            self._windows.move_to_end(key)
+        while len(self._windows) > self.max_cached_windows:
+            self._windows.popitem(last=False)
+        return out
+
+    def embed(self, sequence):
+        return self.embed_many([sequence])[0]
+
+def embed_sequences(sequences, tokenizer, model, device, pooling='mean',
+                    max_tokens_per_batch=8192, max_batch_size=256, progress_every=0, windowed=None, residue_sink=None):
+    """
+    Pooled ESM-2 embeddings for a list of sequences, computed in length-bucketed batches.
+    Invalid sequences (missing or shorter than MIN_SEQUENCE_LENGTH) get a zero vector.
+    Sequences longer than the model context are truncated, or embedded with overlapping windows when a
+    WindowedEmbedder is passed as `windowed`.
+    With residue_sink, residue_sink(i, states [n_residues, dim] float32) also receives the per-residue
+    last_hidden_state of every valid sequences[i] (BOS/EOS excluded; truncated sequences give their first
+    MAX_LENGTH - 2 residues).
+
+    Returns:
+        (np.ndarray [n, dim] in input order, dict with throughput stats)
+    """
+    sequences = list(sequences)
+    dim = model.config.hidden_size
+    out = np.zeros((len(sequences), dim), dtype=np.float32)
+
+    valid = np.array([i for i, s in enumerate(sequences) if is_valid_sequence(s)], dtype=int)
+    start = time.perf_counter()
+    short = valid
+    if windowed is not None:
+        long_rows = np.array([i for i in valid if len(sequences[i]) > windowed.window], dtype=int)
+        if len(long_rows):
+            sink = None if residue_sink is None else (lambda k, states: residue_sink(int(long_rows[k]), states))
+            out[long_rows] = windowed.embed_many([sequences[i] for i in long_rows], residue_sink=sink)
+        short = np.setdiff1d(valid, long_rows)
+    lengths = np.array([len(sequences[i]) for i in short], dtype=int)
+    batches = length_buckets(lengths, max_tokens_per_batch, max_batch_size)
+
+    n_done = len(valid) - len(short)
+    n_tokens = 0
+    with torch.no_grad():
+        for b, batch in enumerate(batches):
+            rows = short[batch]
+            inputs = tokenizer([sequences[i] for i in rows], return_tensors="pt", padding=True,
+                               truncation=True, max_length=MAX_LENGTH)
+            inputs = {k: v.to(device) for k, v in inputs.items()}
+            hidden = model(**inputs).last_hidden_state
+            out[rows] = mean_pool(hidden, inputs['attention_mask'], pooling).float().cpu().numpy()
+            if residue_sink is not None:
+                n_tok = inputs['attention_mask'].sum(dim=1).tolist()
+                states = hidden.float().cpu().numpy()
+                for j, i in enumerate(rows):
+                    residue_sink(int(i), states[j, 1:n_tok[j] - 1])
+
+            n_done += len(rows)
+            n_tokens += int(inputs['attention_mask'].sum())
+            if progress_every and ((b + 1) % progress_every == 0 or b + 1 == len(batches)):
+                elapsed = time.perf_counter() - start
+                print(f"Processed {n_done}/{len(valid)} ({n_done / elapsed:.1f} seq/s)")
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        'sequences': int(len(valid)),
+        'invalid': int(len(sequences) - len(valid)),
+        'batches': len(batches),
+        'tokens': n_tokens,
+        'seconds': elapsed,
+        'sequences_per_second': len(valid) / elapsed if elapsed > 0 else float('inf')
+    }
+    return out, stats
+
+def embedding_frame(ids, embeddings):
+    """
+    Feature table layout used by enzyme_features.csv: id, dim_0 ... dim_{d-1}.
+    """
+    feat_df = pd.DataFrame(embeddings, columns=[f"dim_{j}" for j in range(embeddings.shape[1])])
+    feat_df.insert(0, 'id', list(ids))
+    return feat_df
@@ -0,0 +1,88 @@
+"""
+Purpose: Binary enzyme feature store.
+Overview: Replaces the text table enzyme_features.csv (id + 320 float columns) with a raw array on disk:
+    enzyme_features.npy         [n_enzymes, n_features] float32 (or float16), loaded with np.load(mmap_mode='r')
+    enzyme_features_index.json  row order of enzyme ids, column names and dtype
+Loading maps the file instead of parsing it, so start-up cost does not grow with the catalog.
+"""
+import json
+import os
+import numpy as np
+import pandas as pd
+
+DEFAULT_STORE_PATH = os.path.join("data", "processed", "enzyme_features")
+LEGACY_CSV_PATH = os.path.join("data", "processed", "enzyme_features.csv")
+DTYPES = ('float32', 'float16')
+
+def _paths(path):
+    return path + ".npy", path + "_index.json"
+
+def store_exists(path=DEFAULT_STORE_PATH):
+    return all(os.path.exists(p) for p in _paths(path))
+
+def save_features(ids, matrix, columns=None, path=DEFAULT_STORE_PATH, dtype='float32'):
+    """
+    Writes the feature matrix and its id/column index. Files are replaced atomically.
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Unknown dtype '{dtype}'. Use one of {DTYPES}.")
+    matrix = np.asarray(matrix, dtype=dtype)
+    ids = [str(i) for i in ids]
+    if matrix.ndim != 2 or matrix.shape[0] != len(ids):
+        raise ValueError("matrix must have shape [len(ids), n_features]")
+    if len(set(ids)) != len(ids):
+        raise ValueError("Enzyme ids must be unique")
+    if columns is None:
+        columns = [f"dim_{j}" for j in range(matrix.shape[1])]
+
+    npy_path, index_path = _paths(path)
+    os.makedirs(os.path.dirname(os.path.abspath(npy_path)), exist_ok=True)
+    with open(npy_path + ".tmp", "wb") as f:
+        np.save(f, matrix)
+    with open(index_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({'ids': ids, 'columns': list(columns), 'dtype': dtype}, f)
+    os.replace(npy_path + ".tmp", npy_path)
+    os.replace(index_path + ".tmp", index_path)
+
+def load_features(path=DEFAULT_STORE_PATH, mmap=True):
+    """
+    Returns (matrix [n_enzymes, n_features], {id: row}, column names).
+    With mmap=True the matrix is a read-only memory map; rows are paged in on access.
+    """
+    npy_path, index_path = _paths(path)
+    with open(index_path, encoding="utf-8") as f:
+        index = json.load(f)
+    matrix = np.load(npy_path, mmap_mode='r' if mmap else None)
+    id_to_row = {eid: row for row, eid in enumerate(index['ids'])}
+    return matrix, id_to_row, index['columns']
+
+def load_feature_frame(path=DEFAULT_STORE_PATH, csv_path=LEGACY_CSV_PATH):
+    """
+    Features as the legacy DataFrame layout (id, dim_0, ...), for table-style consumers (merges).
+    Falls back to the CSV when no binary store exists.
+    """
+    if not store_exists(path):
+        return pd.read_csv(csv_path)
+    matrix, id_to_row, columns = load_features(path)
+    df = pd.DataFrame(np.asarray(matrix, dtype=np.float64), columns=columns)
+    df.insert(0, 'id', list(id_to_row))
+    return df
+
+def convert_csv(csv_path=LEGACY_CSV_PATH, path=DEFAULT_STORE_PATH, dtype='float32'):
+    """
+    One-shot conversion of an enzyme_features.csv table into the binary store.
+    """
+    df = pd.read_csv(csv_path)
+    columns = [c for c in df.columns if c != 'id']
+    save_features(df['id'], df[columns].to_numpy(), columns, path=path, dtype=dtype)
+    return len(df), len(columns)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Convert enzyme_features.csv to the binary feature store.")
+    parser.add_argument("--csv", default=LEGACY_CSV_PATH)
+    parser.add_argument("--out", default=DEFAULT_STORE_PATH)
+    parser.add_argument("--dtype", choices=DTYPES, default='float32')
+    args = parser.parse_args()
+    n_rows, n_cols = convert_csv(args.csv, args.out, args.dtype)
+    print(f"Converted {n_rows} enzymes x {n_cols} features to {args.out}.npy ({args.dtype})")
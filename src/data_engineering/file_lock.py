@@ -0,0 +1,28 @@
+"""
+Purpose: Inter-process file lock.
+Overview: Exclusive advisory lock (fcntl.flock) on a lock file, used to serialize appends to the shared on-disk stores
+(embedding cache, residue store, feedback journal). Platforms without fcntl fall back to no inter-process locking.
+"""
+try:
+    import fcntl  # POSIX advisory locks
+except ImportError:
+    fcntl = None
+
+class FileLock:
+    """
+    Exclusive advisory lock on a file, serializing appends across processes.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._f = None
+
+    def __enter__(self):
+        self._f = open(self.path, "a")
+        if fcntl is not None:
+            fcntl.flock(self._f, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self._f, fcntl.LOCK_UN)
+        self._f.close()
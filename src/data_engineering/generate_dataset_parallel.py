@@ -8,63 +8,425 @@ import os
 import sys
 from joblib import Parallel, delayed
 import time
+import json
+from datetime import datetime
 
 # Add src to path to import validator
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 from src.validation.validator import EnzymeValidator
+from src.validation.yield_table import YieldTable
+from src.data_engineering.condition_sampling import sample_conditions, load_uncertainty_model
 
-def simulate_single_condition(row, temp, ph, substrate, activity_map, enzyme_conc_gL=1e-5, duration=24*3600):
+# Columns shipped to workers (compact float arrays, no pandas objects)
+SIM_COLUMNS = ['kcat', 'Km', 'Ki', 'temp', 'ph', 't_opt', 'ph_opt']
+
+# Append-only result shards (one CSV per finished chunk) and the key identifying a finished row
+SHARD_DIR = "data/processed/training_shards"
+KEY_COLUMNS = ['id', 'temp', 'ph', 'substrate', 'param_hash']
+DATASET_COLUMNS = ['id', 'temp', 'ph', 'substrate', 'yield', 'kcat_base', 'Km_base', 'enzyme_type']
+
+# Per-row task outcomes
+STATUS_SUCCESS = 'success'
+STATUS_SOLVER_ERROR = 'solver_error'
+STATUS_VALIDATION_ERROR = 'validation_error'
+
+# One validator per worker process (compiled RoadRunner models are reused across chunks)
+_WORKER_VALIDATORS = {}
+
+def _get_worker_validator(backend):
+    validator = _WORKER_VALIDATORS.get(backend)
+    if validator is None:
+        # Created inside the worker: RoadRunner objects are C++ pointers and are not pickleable
+        validator = EnzymeValidator(backend=backend)
+        _WORKER_VALIDATORS[backend] = validator
+    return validator
+
+def validate_chunk_params(chunk):
+    """
+    Parameter validation per row. Returns an array of failure reasons ('' for valid rows).
     """
-    Worker function for a single simulation.
-    Must be standalone for pickling.
+    n = len(chunk['kcat'])
+    reasons = np.full(n, '', dtype=object)
+    checks = [
+        ('kcat', lambda v: np.isfinite(v) & (v >= 0), 'kcat<0 or non-finite'),
+        ('Km', lambda v: np.isfinite(v) & (v > 0), 'Km<=0 or non-finite'),
+        ('Ki', lambda v: np.isfinite(v) & (v > 0), 'Ki<=0 or non-finite'),
+        ('temp', np.isfinite, 'temp non-finite'),
+        ('ph', np.isfinite, 'ph non-finite'),
+        ('t_opt', np.isfinite, 't_opt non-finite'),
+        ('ph_opt', np.isfinite, 'ph_opt non-finite'),
+    ]
+    for col, check, reason in checks:
+        bad = ~check(np.asarray(chunk[col], dtype=float)) & (reasons == '')
+        reasons[bad] = reason
+    return reasons
+
+def _solve_rows(validator, backend, chunk, rows, enzyme_conc_gL, duration):
+    """
+    Final product for the given chunk rows. Returns (p_final, errors) where errors is a
+    list of (row position within `rows`, exception class name, message).
+    """
+    args = dict(
+        kcat=chunk['kcat'][rows], Km=chunk['Km'][rows], substrate_conc_init=100.0,
+        enzyme_conc=enzyme_conc_gL, duration=duration,
+        temp=chunk['temp'][rows], ph=chunk['ph'][rows], ki=chunk['Ki'][rows],
+        t_opt=chunk['t_opt'][rows], ph_opt=chunk['ph_opt'][rows]
+    )
+    if backend == 'analytic':
+        return np.atleast_1d(validator.calculate_final_product(**args)), []
+    # Endpoint only: two output points (t=0, t=duration), no dense trajectory
+    _, _, p_conc, errors = validator.run_kinetic_simulation_batch(steps=2, return_errors=True, **args)
+    return p_conc[:, -1], errors
+
+def simulate_chunk(chunk, backend='analytic', enzyme_conc_gL=1e-5, duration=24*3600, chunk_id=None):
     """
+    Worker function for a chunk of conditions.
+    
+    Args:
+        chunk (dict): SIM_COLUMNS -> float arrays of equal length (kcat already scaled by substrate activity).
+        backend (str): 'analytic' (integrated rate law), 'numpy' (vectorized RK45) or 'tellurium'.
+    Returns:
+        dict: 'yield' array (NaN for failed rows), per-row 'status' / 'error_class' / 'error_message',
+              'chunk_id' (echoed), worker 'pid' and 'elapsed' seconds.
+    """
+    start = time.perf_counter()
+    validator = _get_worker_validator(backend)
+    n = len(chunk['kcat'])
+    
+    yields = np.full(n, np.nan)
+    status = np.full(n, STATUS_SUCCESS, dtype=object)
+    error_class = np.full(n, '', dtype=object)
+    error_message = np.full(n, '', dtype=object)
+    
+    reasons = validate_chunk_params(chunk)
+    invalid = reasons != ''
+    status[invalid] = STATUS_VALIDATION_ERROR
+    error_class[invalid] = 'ParameterValidationError'
+    error_message[invalid] = reasons[invalid]
+    
+    rows = np.flatnonzero(~invalid)
     try:
-        # Re-instantiate validator inside worker to avoid Roadrunner pickling issues
-        # (Roadrunner objects are C++ pointers, often not pickleable)
-        val_local = EnzymeValidator()
-        
-        eid = row['id']
-        kcat_base = row['kcat']
-        Km_base = row['Km'] 
-        spec_type = row.get('specificity', 'Other')
-        ki = row['Ki']
-        t_opt = row['t_opt']
-        ph_opt = row['ph_opt']
-        
-        eff = activity_map.get(spec_type, {}).get(substrate, 0.05)
-        kcat_eff_sub = kcat_base * eff
-        
-        t, y = val_local.run_kinetic_simulation(
-            kcat=kcat_eff_sub, Km=Km_base, 
-            substrate_conc_init=100.0,
-            enzyme_conc=enzyme_conc_gL,
-            duration=duration, 
-            temp=temp, ph=ph, ki=ki,
-            t_opt=t_opt, ph_opt=ph_opt
-        )
+        p_final, errors = _solve_rows(validator, backend, chunk, rows, enzyme_conc_gL, duration)
+    except Exception:
+        # A vectorized solve fails as a whole: retry row by row to isolate the failing conditions
+        p_final = np.full(len(rows), np.nan)
+        errors = []
+        for k, row in enumerate(rows):
+            try:
+                p_row, row_errors = _solve_rows(validator, backend, chunk, rows[k:k + 1], enzyme_conc_gL, duration)
+                p_final[k] = p_row[0]
+                errors.extend((k, cls, msg) for _, cls, msg in row_errors)
+            except Exception as e:
+                errors.append((k, type(e).__name__, str(e)))
+    
+    yields[rows] = np.asarray(p_final, dtype=float) / 100.0
+    for k, cls, msg in errors:
+        status[rows[k]] = STATUS_SOLVER_ERROR
+        error_class[rows[k]] = cls
+        error_message[rows[k]] = msg
+    
+    nonfinite = (status == STATUS_SUCCESS) & ~np.isfinite(yields)
+    status[nonfinite] = STATUS_SOLVER_ERROR
+    error_class[nonfinite] = 'NonFiniteResult'
+    error_message[nonfinite] = 'solver returned NaN/inf'
+    yields[status != STATUS_SUCCESS] = np.nan
+    
+    return {
+        'yield': yields,
+        'status': status,
+        'error_class': error_class,
+        'error_message': error_message,
+        'chunk_id': chunk_id,
+        'pid': os.getpid(),
+        'elapsed': time.perf_counter() - start
+    }
+
+def build_condition_grid(df_enz, temps, phs, substrates, activity_map):
+    """
+    Columnar enzyme x substrate x temp x pH grid (same row order as nested loops over
+    enzymes, substrates, temps, pHs). kcat is already scaled by substrate activity.
+    """
+    # Grid axes: enzyme, substrate, temp, pH
+    E_idx, S_idx, T_idx, P_idx = np.meshgrid(
+        np.arange(len(df_enz)), np.arange(len(substrates)), np.arange(len(temps)), np.arange(len(phs)),
+        indexing='ij'
+    )
+    E_idx, S_idx, T_idx, P_idx = E_idx.ravel(), S_idx.ravel(), T_idx.ravel(), P_idx.ravel()
+    return conditions_to_grid(
+        df_enz, E_idx, S_idx,
+        np.asarray(temps, dtype=float)[T_idx], np.asarray(phs, dtype=float)[P_idx],
+        substrates, activity_map
+    )
+
+def conditions_to_grid(df_enz, E_idx, S_idx, temp, ph, substrates, activity_map):
+    """
+    Columnar condition table from per-row enzyme positions, substrate positions and temp/pH values.
+    """
+    spec = df_enz['specificity'] if 'specificity' in df_enz.columns else pd.Series('Other', index=df_enz.index)
+    eff = np.array([[activity_map.get(sp, {}).get(sub, 0.05) for sub in substrates] for sp in spec])
+    kcat = df_enz['kcat'].to_numpy(dtype=float)
+    
+    return {
+        'id': df_enz['id'].to_numpy()[E_idx],
+        'substrate': np.asarray(substrates)[S_idx],
+        'enzyme_type': spec.to_numpy()[E_idx],
+        'kcat_base': kcat[E_idx],
+        'kcat': kcat[E_idx] * eff[E_idx, S_idx],
+        'Km': df_enz['Km'].to_numpy(dtype=float)[E_idx],
+        'Ki': df_enz['Ki'].to_numpy(dtype=float)[E_idx],
+        'temp': np.asarray(temp, dtype=float),
+        'ph': np.asarray(ph, dtype=float),
+        't_opt': df_enz['t_opt'].to_numpy(dtype=float)[E_idx],
+        'ph_opt': df_enz['ph_opt'].to_numpy(dtype=float)[E_idx]
+    }
+
+def compute_param_hash(grid, enzyme_conc_gL=1e-5, duration=24*3600):
+    """
+    Per-row hash of everything the yield depends on besides (id, temp, ph, substrate),
+    so rows are recomputed when an enzyme's kinetic parameters or the protocol change.
+    """
+    n = len(grid['kcat'])
+    params = pd.DataFrame({
+        'kcat': grid['kcat'], 'Km': grid['Km'], 'Ki': grid['Ki'],
+        't_opt': grid['t_opt'], 'ph_opt': grid['ph_opt'],
+        'enzyme_conc': np.full(n, float(enzyme_conc_gL)), 'duration': np.full(n, float(duration))
+    })
+    hashes = pd.util.hash_pandas_object(params, index=False).to_numpy()
+    return np.array([f"{h:016x}" for h in hashes])
+
+def grid_to_dataframe(grid, yields, rows=None):
+    """
+    Training dataset rows (schema of training_dataset.csv + param_hash) with a finite yield.
+    `yields` covers the whole grid, or only the grid rows listed in `rows`.
+    """
+    rows = np.arange(len(grid['kcat'])) if rows is None else np.asarray(rows)
+    yields = np.asarray(yields, dtype=float)
+    valid = np.isfinite(yields)
+    rows, yields = rows[valid], yields[valid]
+    return pd.DataFrame({
+        'id': grid['id'][rows],
+        'temp': grid['temp'][rows],
+        'ph': grid['ph'][rows],
+        'substrate': grid['substrate'][rows],
+        'yield': np.round(yields, 4),
+        'kcat_base': grid['kcat_base'][rows],
+        'Km_base': grid['Km'][rows],
+        'enzyme_type': grid['enzyme_type'][rows],
+        'param_hash': grid['param_hash'][rows]
+    })
+
+def write_shard(shard_dir, df_shard):
+    """
+    Writes one append-only shard atomically (temp file + rename), so a crash never leaves a partial shard.
+    """
+    if df_shard.empty:
+        return None
+    os.makedirs(shard_dir, exist_ok=True)
+    name = f"shard_{time.strftime('%Y%m%d%H%M%S')}_{os.getpid()}_{time.perf_counter_ns()}.csv"
+    path = os.path.join(shard_dir, name)
+    tmp_path = path + ".tmp"
+    df_shard.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+def read_shards(shard_dir):
+    """
+    All finished rows from the shard directory (later shards win on duplicate keys).
+    """
+    if not os.path.isdir(shard_dir):
+        return pd.DataFrame(columns=DATASET_COLUMNS + ['param_hash'])
+    files = sorted(f for f in os.listdir(shard_dir) if f.endswith('.csv'))
+    if not files:
+        return pd.DataFrame(columns=DATASET_COLUMNS + ['param_hash'])
+    df = pd.concat([pd.read_csv(os.path.join(shard_dir, f), dtype={'param_hash': str}) for f in files], ignore_index=True)
+    return df.drop_duplicates(subset=KEY_COLUMNS, keep='last')
+
+def completed_mask(grid, df_done):
+    """
+    Boolean mask over grid rows whose (id, temp, ph, substrate, param_hash) already has a result.
+    """
+    if df_done.empty:
+        return np.zeros(len(grid['kcat']), dtype=bool)
+    grid_keys = pd.MultiIndex.from_arrays([grid[c] for c in KEY_COLUMNS])
+    done_keys = pd.MultiIndex.from_frame(df_done[KEY_COLUMNS])
+    return grid_keys.isin(done_keys)
+
+def compact_shards(shard_dir, grid, output_file):
+    """
+    Consolidates shards into the final dataset: rows of the current grid only (stale parameter
+    hashes are dropped), in grid order. The shard directory is replaced by one compacted shard.
+    """
+    df_done = read_shards(shard_dir)
+    df_grid = pd.DataFrame({c: grid[c] for c in KEY_COLUMNS})
+    df_res = df_grid.merge(df_done[KEY_COLUMNS + ['yield', 'kcat_base', 'Km_base', 'enzyme_type']],
+                           on=KEY_COLUMNS, how='inner')
+    
+    df_res[DATASET_COLUMNS].to_csv(output_file, index=False)
+    
+    old_files = [f for f in os.listdir(shard_dir) if f.endswith('.csv')] if os.path.isdir(shard_dir) else []
+    if len(old_files) > 1:
+        write_shard(shard_dir, df_res[DATASET_COLUMNS + ['param_hash']])
+        for f in old_files:
+            os.remove(os.path.join(shard_dir, f))
+    return df_res[DATASET_COLUMNS]
+
+def lookup_grid_yields(grid, enzyme_conc_gL=1e-5, duration=24*3600):
+    """
+    Answers the whole condition grid from the precomputed yield table
+    (one vectorized lookup, no ODE solves).
+    """
+    table = YieldTable.load_or_build()
+    return table.yield_for_conditions(
+        kcat=grid['kcat'], Km=grid['Km'], Ki=grid['Ki'],
+        temp=grid['temp'], ph=grid['ph'],
+        t_opt=grid['t_opt'], ph_opt=grid['ph_opt'],
+        enzyme_conc=enzyme_conc_gL, substrate_conc_init=100.0, duration=duration
+    )
+
+def run_chunked_simulations(grid, rows=None, backend='analytic', n_jobs=-1, chunk_size=1024, on_chunk=None,
+                            progress_interval=2.0):
+    """
+    Splits the grid rows (all, or the subset `rows`) into compact NumPy chunks and runs them on
+    long-lived joblib workers. Finished chunks are handed to on_chunk(row_indices, chunk_output)
+    as they arrive; live throughput and ETA are printed every `progress_interval` seconds.
+    Returns (yields over the full grid, NaN where not run or failed; outcomes dict; throughput report dict).
+    """
+    n_grid = len(grid['kcat'])
+    rows = np.arange(n_grid) if rows is None else np.asarray(rows)
+    n = len(rows)
+    row_chunks = [rows[i:i + chunk_size] for i in range(0, n, chunk_size)]
+    chunks = [{c: grid[c][idx] for c in SIM_COLUMNS} for idx in row_chunks]
+    
+    yields = np.full(n_grid, np.nan)
+    outcomes = {
+        'status': np.full(n_grid, '', dtype=object),
+        'error_class': np.full(n_grid, '', dtype=object),
+        'error_message': np.full(n_grid, '', dtype=object)
+    }
+    worker_latency = {}  # pid -> list of per-simulation latency (chunk seconds / chunk rows)
+    chunk_times = []
+    completed = 0
+    
+    start = time.perf_counter()
+    last_progress = start
+    outputs = Parallel(n_jobs=n_jobs, return_as="generator_unordered")(
+        delayed(simulate_chunk)(chunk, backend, chunk_id=i) for i, chunk in enumerate(chunks)
+    )
+    for out in outputs:
+        idx = row_chunks[out['chunk_id']]
+        yields[idx] = out['yield']
+        for key in outcomes:
+            outcomes[key][idx] = out[key]
+        chunk_times.append(out['elapsed'])
+        worker_latency.setdefault(out['pid'], []).append(out['elapsed'] / max(len(idx), 1))
+        completed += len(idx)
+        if on_chunk is not None:
+            on_chunk(idx, out)
         
-        if y is not None:
-            p_final = y[-1, 1]
-            yield_val = p_final / 100.0
-            
-            return {
-                'id': eid,
-                'temp': temp,
-                'ph': ph,
-                'substrate': substrate,
-                'yield': round(yield_val, 4),
-                'kcat_base': kcat_base,
-                'Km_base': Km_base,
-                'enzyme_type': spec_type
+        now = time.perf_counter()
+        if now - last_progress >= progress_interval or completed == n:
+            rate = completed / (now - start) if now > start else float('inf')
+            eta = (n - completed) / rate if rate > 0 else float('inf')
+            n_failed = int(np.sum(outcomes['status'][rows] != STATUS_SUCCESS) - (n - completed))
+            print(f"  Progress: {completed}/{n} ({completed / n:.0%}) | {rate:.0f} sims/s | "
+                  f"ETA {eta:.0f}s | failures {n_failed}")
+            last_progress = now
+    wall = time.perf_counter() - start
+    
+    chunk_times = np.array(chunk_times)
+    busy = chunk_times.sum()
+    n_workers = len(worker_latency)
+    report = {
+        'backend': backend,
+        'simulations': n,
+        'chunks': len(chunks),
+        'chunk_size': chunk_size,
+        'workers': n_workers,
+        'wall_seconds': wall,
+        'sims_per_second': n / wall if wall > 0 else float('inf'),
+        'worker_busy_seconds': busy,
+        'mean_chunk_seconds': float(chunk_times.mean()) if len(chunk_times) else 0.0,
+        'max_chunk_seconds': float(chunk_times.max()) if len(chunk_times) else 0.0,
+        # Share of wall time spent outside simulation code (scheduling, pickling, pool start-up)
+        'overhead_fraction': max(0.0, 1.0 - busy / (wall * max(n_workers, 1))) if wall > 0 else 0.0,
+        # Per-simulation latency percentiles (seconds) per worker process
+        'worker_latency': {
+            str(pid): {
+                'chunks': len(lat),
+                'p50': float(np.percentile(lat, 50)),
+                'p90': float(np.percentile(lat, 90)),
+                'p99': float(np.percentile(lat, 99))
             }
-    except Exception as e:
-        # print(f"Error in {eid}: {e}")
-        return None
-    return None
+            for pid, lat in worker_latency.items()
+        }
+    }
+    return yields, outcomes, report
 
-def generate_dataset_parallel():
+def print_throughput_report(report):
+    print("Throughput Report")
+    print(f"  Backend:          {report['backend']}")
+    print(f"  Simulations:      {report['simulations']} in {report['chunks']} chunks of <= {report['chunk_size']}")
+    print(f"  Workers:          {report['workers']}")
+    print(f"  Wall time:        {report['wall_seconds']:.2f} s ({report['sims_per_second']:.0f} sims/s)")
+    print(f"  Chunk time:       mean {report['mean_chunk_seconds']:.3f} s, max {report['max_chunk_seconds']:.3f} s")
+    print(f"  Overhead share:   {report['overhead_fraction'] * 100:.1f}% of worker-wall time")
+    for pid, lat in report.get('worker_latency', {}).items():
+        print(f"  Worker {pid}: {lat['chunks']} chunks, latency/sim p50 {lat['p50'] * 1e3:.3f} ms, "
+              f"p90 {lat['p90'] * 1e3:.3f} ms, p99 {lat['p99'] * 1e3:.3f} ms")
+
+def summarize_outcomes(grid, outcomes, rows, max_examples=100):
+    """
+    Counts per outcome status and exception class, plus example failed conditions.
+    """
+    status = outcomes['status'][rows]
+    error_class = outcomes['error_class'][rows]
+    failed = rows[status != STATUS_SUCCESS]
+    by_class = pd.Series(error_class[status != STATUS_SUCCESS]).value_counts().to_dict()
+    return {
+        'by_status': {str(k): int(v) for k, v in pd.Series(status).value_counts().items()},
+        'by_error_class': {str(k): int(v) for k, v in by_class.items()},
+        'failure_examples': [
+            {
+                'id': str(grid['id'][i]), 'temp': float(grid['temp'][i]), 'ph': float(grid['ph'][i]),
+                'substrate': str(grid['substrate'][i]), 'status': str(outcomes['status'][i]),
+                'error_class': str(outcomes['error_class'][i]), 'message': str(outcomes['error_message'][i])
+            }
+            for i in failed[:max_examples]
+        ]
+    }
+
+def write_run_report(output_file, report):
+    """
+    Machine-readable run report next to the dataset (training_dataset.csv -> training_dataset_report.json).
+    """
+    path = os.path.splitext(output_file)[0] + "_report.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+def generate_dataset_parallel(use_yield_table=False, backend='analytic', n_jobs=-1, chunk_size=1024,
+                              shard_dir=SHARD_DIR, resume=True,
+                              sampling='grid', samples_per_enzyme=24,
+                              optimum_fraction=0.25, uncertainty_fraction=0.0):
+    """
+    Args:
+        use_yield_table (bool): Answer the grid from the interpolated yield table
+            (src/validation/yield_table.py, ~1e-4 yield error) instead of per-condition simulations.
+        backend (str): Simulation backend for workers: 'analytic', 'numpy' or 'tellurium'.
+        n_jobs (int): joblib worker count (-1 = all cores).
+        chunk_size (int): Conditions per worker task.
+        shard_dir (str): Append-only result shards; each finished chunk is written immediately.
+        resume (bool): Skip grid rows already present in shard_dir (same id/temp/ph/substrate/param_hash).
+            resume=False discards existing shards and recomputes the whole grid.
+        sampling (str): 'grid' (full factorial temps x pHs x substrates) or 'sobol' / 'lhs'
+            (continuous temp/pH, samples_per_enzyme conditions per enzyme; see condition_sampling.py).
+        optimum_fraction (float): Share of each enzyme's budget placed around its t_opt / ph_opt.
+        uncertainty_fraction (float): Share placed where the current yield predictor is most uncertain.
+    """
     input_kinetics = "data/processed/enzyme_kinetics.csv"
     output_file = "data/processed/training_dataset.csv"
+    enzyme_conc_gL = 1e-5
+    duration = 24 * 3600
     
     if not os.path.exists(input_kinetics):
         print("Error: Kinetics file not found.")
@@ -84,36 +446,104 @@ def generate_dataset_parallel():
         'Other':     {'Cellulose': 0.05, 'Xylan': 0.05, 'Bagasse': 0.05}
     }
     
-    tasks = []
-    print(f"Generating tasks for {len(df_enz)} enzymes x {len(temps)} temps x {len(phs)} pHs x {len(substrates)} substrates.")
-    
-    for idx, row in df_enz.iterrows():
-        for sub in substrates:
-            for temp in temps:
-                for ph in phs:
-                    tasks.append((row, temp, ph, sub))
-                    
-    total_tasks = len(tasks)
+    if sampling == 'grid':
+        print(f"Generating grid for {len(df_enz)} enzymes x {len(temps)} temps x {len(phs)} pHs x {len(substrates)} substrates.")
+        grid = build_condition_grid(df_enz, temps, phs, substrates, activity_map)
+    else:
+        print(f"Sampling {samples_per_enzyme} conditions per enzyme ({sampling}, "
+              f"optimum={optimum_fraction:.0%}, uncertainty={uncertainty_fraction:.0%}) for {len(df_enz)} enzymes.")
+        predictor = load_uncertainty_model() if uncertainty_fraction > 0 else None
+        E_idx, S_idx, temp, ph = sample_conditions(
+            df_enz, substrates, samples_per_enzyme=samples_per_enzyme, method=sampling,
+            optimum_fraction=optimum_fraction, uncertainty_fraction=uncertainty_fraction, predictor=predictor
+        )
+        grid = conditions_to_grid(df_enz, E_idx, S_idx, temp, ph, substrates, activity_map)
+        # Rounded continuous samples can coincide; keep each (id, temp, ph, substrate) once
+        keep = ~pd.DataFrame({c: grid[c] for c in ['id', 'temp', 'ph', 'substrate']}).duplicated().to_numpy()
+        grid = {c: v[keep] for c, v in grid.items()}
+    grid['param_hash'] = compute_param_hash(grid, enzyme_conc_gL, duration)
+    total_tasks = len(grid['kcat'])
     print(f"Total Simulations: {total_tasks}")
     
-    print("Starting Parallel Execution (n_jobs=-1)...")
-    start_time = time.time()
+    run_report = {
+        'started_at': datetime.now().isoformat(),
+        'config': {
+            'backend': 'yield_table' if use_yield_table else backend, 'n_jobs': n_jobs, 'chunk_size': chunk_size,
+            'sampling': sampling, 'samples_per_enzyme': samples_per_enzyme,
+            'optimum_fraction': optimum_fraction, 'uncertainty_fraction': uncertainty_fraction,
+            'enzyme_conc': enzyme_conc_gL, 'duration': duration, 'resume': resume
+        },
+        'enzymes': len(df_enz),
+        'grid_rows': total_tasks
+    }
     
-    # Execute in parallel
-    results = Parallel(n_jobs=-1, verbose=5)(
-        delayed(simulate_single_condition)(row, t, p, s, activity_map) for row, t, p, s in tasks
-    )
+    if use_yield_table:
+        print("Answering full grid from yield table (no ODE solves)...")
+        start_time = time.time()
+        yields = lookup_grid_yields(grid, enzyme_conc_gL, duration)
+        print(f"Completed {total_tasks} lookups in {time.time() - start_time:.2f} seconds.")
+        df_res = grid_to_dataframe(grid, yields)[DATASET_COLUMNS]
+        print(f"{len(df_res)} valid results out of {total_tasks}")
+        df_res.to_csv(output_file, index=False)
+        print(f"Saved dataset to {output_file}")
+        run_report.update({'finished_at': datetime.now().isoformat(), 'dataset_rows': len(df_res)})
+        print(f"Saved run report to {write_run_report(output_file, run_report)}")
+        return
+    
+    if not resume and os.path.isdir(shard_dir):
+        for f in os.listdir(shard_dir):
+            if f.endswith('.csv'):
+                os.remove(os.path.join(shard_dir, f))
     
-    # Filter None
-    valid_results = [r for r in results if r is not None]
+    done = completed_mask(grid, read_shards(shard_dir))
+    todo = np.flatnonzero(~done)
+    print(f"Resuming: {int(done.sum())} rows already in {shard_dir}, {len(todo)} to simulate.")
     
-    end_time = time.time()
-    duration = end_time - start_time
-    print(f"Completed in {duration:.1f} seconds. ({len(valid_results)} valid results out of {total_tasks})")
+    run_report['resumed_rows'] = int(done.sum())
     
-    df_res = pd.DataFrame(valid_results)
-    df_res.to_csv(output_file, index=False)
+    if len(todo):
+        print(f"Starting Parallel Execution (n_jobs={n_jobs}, chunk_size={chunk_size}, backend={backend})...")
+        
+        def checkpoint(rows, out):
+            # Stream finished rows to an append-only shard right away (failed rows are retried next run)
+            write_shard(shard_dir, grid_to_dataframe(grid, out['yield'], rows))
+        
+        _, outcomes, report = run_chunked_simulations(
+            grid, rows=todo, backend=backend, n_jobs=n_jobs, chunk_size=chunk_size, on_chunk=checkpoint
+        )
+        print_throughput_report(report)
+        run_report['throughput'] = report
+        run_report['outcomes'] = summarize_outcomes(grid, outcomes, todo)
+        
+        n_failed = len(todo) - run_report['outcomes']['by_status'].get(STATUS_SUCCESS, 0)
+        if n_failed:
+            print(f"Failures: {n_failed} ({run_report['outcomes']['by_status']}, "
+                  f"classes {run_report['outcomes']['by_error_class']})")
+    
+    df_res = compact_shards(shard_dir, grid, output_file)
+    print(f"{len(df_res)} valid results out of {total_tasks}")
     print(f"Saved dataset to {output_file}")
+    
+    run_report.update({'finished_at': datetime.now().isoformat(), 'dataset_rows': len(df_res)})
+    print(f"Saved run report to {write_run_report(output_file, run_report)}")
 
 if __name__ == "__main__":
-    generate_dataset_parallel()
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate the yield training dataset.")
+    parser.add_argument("--table", action="store_true", help="Use the interpolated yield table instead of simulations")
+    parser.add_argument("--backend", default="analytic", choices=["analytic", "numpy", "tellurium"])
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--chunk-size", type=int, default=1024)
+    parser.add_argument("--shard-dir", default=SHARD_DIR)
+    parser.add_argument("--no-resume", action="store_true", help="Discard existing shards and recompute everything")
+    parser.add_argument("--sampling", default="grid", choices=["grid", "sobol", "lhs"])
+    parser.add_argument("--samples-per-enzyme", type=int, default=24)
+    parser.add_argument("--optimum-fraction", type=float, default=0.25)
+    parser.add_argument("--uncertainty-fraction", type=float, default=0.0)
+    args = parser.parse_args()
+    generate_dataset_parallel(use_yield_table=args.table, backend=args.backend,
+                              n_jobs=args.n_jobs, chunk_size=args.chunk_size,
+                              shard_dir=args.shard_dir, resume=not args.no_resume,
+                              sampling=args.sampling, samples_per_enzyme=args.samples_per_enzyme,
+                              optimum_fraction=args.optimum_fraction,
+                              uncertainty_fraction=args.uncertainty_fraction)
@@ -1,17 +1,33 @@
 """
 Purpose: Protein Feature Engineering.
 Overview: Generates numerical embedding vectors for enzyme sequences using ESM-2 (8M parameter model).
+Sequences are embedded in length-bucketed batches (see esm_embedding.py); embeddings already in the shared
+embedding store (embedding_cache.py) are reused without running the model. Output goes to the binary feature
+store (feature_store.py); a CSV copy is optional. With --residues the per-residue hidden states are also kept,
+in the float16 residue store (residue_store.py).
+Catalogs too large to hold in memory (FASTA or CSV, 10^5+ sequences) go through embed_stream.py instead.
 """
 import pandas as pd
 import numpy as np
 import os
-import torch
-from transformers import EsmTokenizer, EsmModel
+import sys
+import argparse
 
-def generate_features():
+sys.path.append(os.path.dirname(__file__))
+from esm_embedding import MODEL_NAME, EMBEDDING_DIM, POOLING_MODES, INFERENCE_OPTIONS, DEFAULT_INFERENCE_MODE, DEFAULT_NUM_THREADS, load_esm, embedding_model_key, WindowedEmbedder, embed_sequences, embedding_frame, is_valid_sequence
+from embedding_cache import EmbeddingCache
+from feature_store import DEFAULT_STORE_PATH, DTYPES, save_features
+from residue_store import DEFAULT_RESIDUE_STORE_DIR, ResidueStore
+
+RESIDUE_FLUSH_SEQUENCES = 256
+
+def generate_features(pooling='mean', max_tokens_per_batch=8192, max_batch_size=256, use_cache=True,
+                      dtype='float32', export_csv=False, mode=DEFAULT_INFERENCE_MODE, num_threads=DEFAULT_NUM_THREADS, windowed=False,
+                      residues=False, residue_path=DEFAULT_RESIDUE_STORE_DIR):
     input_file = "data/processed/enzyme_kinetics.csv"
-    output_file = "data/processed/enzyme_features.csv"
-    
+    output_file = DEFAULT_STORE_PATH
+    csv_file = "data/processed/enzyme_features.csv"
+
     if not os.path.exists(input_file):
         print(f"Error: {input_file} not found.")
         return
@@ -19,63 +35,95 @@ def generate_features():
     df = pd.read_csv(input_file)
     sequences = df['sequence'].tolist()
     ids = df['id'].tolist()
-    
-    print(f"Loading ESM-2 Model (facebook/esm2_t6_8M_UR50D)...")
-    try:
-        tokenizer = EsmTokenizer.from_pretrained("facebook/esm2_t6_8M_UR50D")
-        model = EsmModel.from_pretrained("facebook/esm2_t6_8M_UR50D")
-    except Exception as e:
-        print(f"Error loading model: {e}")
-        print("Please ensure 'transformers' and 'torch' are installed.")
-        return
 
-    print(f"Generating features for {len(sequences)} enzymes...")
-    
-    embeddings = []
-    
-    # Process in batches or single loop
-    model.eval()
-    
-    # Check for GPU
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    model.to(device)
-    print(f"Inference running on: {device}")
-    
-    with torch.no_grad():
-        for i, seq in enumerate(sequences):
-            if pd.isna(seq) or len(seq) < 5:
-                # Handle invalid sequences with zero vector
-                embeddings.append(np.zeros(320)) 
-                continue
-                
-            # Tokenize
-            inputs = tokenizer(seq, return_tensors="pt", truncation=True, max_length=1024)
-            inputs = {k: v.to(device) for k, v in inputs.items()}
-            
-            # Forward pass
-            outputs = model(**inputs)
-            
-            # Get mean embedding (excluding special tokens? simple mean is fine for now)
-            # last_hidden_state: [batch, len, dim=320]
-            # Mean over sequence length dimension
-            seq_embedding = outputs.last_hidden_state.mean(dim=1).cpu().numpy()[0]
-            
-            embeddings.append(seq_embedding)
-            
-            if (i+1) % 10 == 0:
-                print(f"Processed {i+1}/{len(sequences)}")
-    
-    # Stack features
-    features_arr = np.vstack(embeddings)
-    dim = features_arr.shape[1]
-    
-    # Create DataFrame
-    feat_df = pd.DataFrame(features_arr, columns=[f"dim_{j}" for j in range(dim)])
-    feat_df.insert(0, 'id', ids)
-    
+    features_arr = np.zeros((len(sequences), EMBEDDING_DIM), dtype=np.float32)
+    valid = [i for i, seq in enumerate(sequences) if is_valid_sequence(seq)]
+    todo = valid
+    cache_pooling = f"{pooling}+windowed" if windowed else pooling
+    cache = EmbeddingCache(embedding_model_key(MODEL_NAME, mode), cache_pooling) if use_cache else None
+    if cache is not None:
+        cached, found = cache.get_many([sequences[i] for i in valid])
+        todo = [i for i, hit in zip(valid, found) if not hit]
+        if found.any():
+            features_arr[np.array(valid)[found]] = cached[found]
+        print(f"Embedding cache: {int(found.sum())}/{len(valid)} sequences already embedded")
+
+    residue_store = None
+    if residues:
+        # Per-residue states are not in the pooled cache: also embed every enzyme the residue store lacks
+        residue_store = ResidueStore(residue_path, model_name=f"{embedding_model_key(MODEL_NAME, mode)}+{'windowed' if windowed else 'truncated'}")
+        missing = [i for i in valid if not residue_store.has(ids[i], sequences[i])]
+        print(f"Residue store: {len(valid) - len(missing)}/{len(valid)} enzymes already stored")
+        todo = sorted(set(todo) | set(missing))
+
+    if todo:
+        print(f"Loading ESM-2 Model ({MODEL_NAME})...")
+        try:
+            tokenizer, model, device = load_esm(MODEL_NAME, mode=mode, num_threads=num_threads)
+        except Exception as e:
+            print(f"Error loading model: {e}")
+            print("Please ensure 'transformers' and 'torch' are installed.")
+            return
+
+        print(f"Generating features for {len(todo)} enzymes...")
+        print(f"Inference running on: {device} (mode={mode}, pooling={pooling}, max_tokens_per_batch={max_tokens_per_batch})")
+
+        todo_seqs = [sequences[i] for i in todo]
+        # Long sequences: overlapping windows instead of truncation to the model context
+        window_embedder = WindowedEmbedder(tokenizer, model, device, pooling, max_tokens_per_batch=max_tokens_per_batch) if windowed else None
+
+        pending = []  # (row in todo, per-residue states), flushed to the residue store in groups
+        def flush_residues():
+            residue_store.put_many([ids[todo[k]] for k, _ in pending], [todo_seqs[k] for k, _ in pending],
+                                   [states for _, states in pending])
+            pending.clear()
+        def residue_sink(k, states):
+            pending.append((k, states))
+            if len(pending) >= RESIDUE_FLUSH_SEQUENCES:
+                flush_residues()
+
+        computed, stats = embed_sequences(
+            todo_seqs, tokenizer, model, device, pooling=pooling,
+            max_tokens_per_batch=max_tokens_per_batch, max_batch_size=max_batch_size, progress_every=10,
+            windowed=window_embedder, residue_sink=residue_sink if residue_store is not None else None
+        )
+        features_arr[todo] = computed
+        print(f"Embedded {stats['sequences']} sequences in {stats['batches']} batches: "
+              f"{stats['seconds']:.1f} s ({stats['sequences_per_second']:.1f} seq/s)")
+        if cache is not None:
+            cache.put_many(todo_seqs, computed)
+        if pending:
+            flush_residues()
+    if residue_store is not None:
+        print(f"Residue store: {len(residue_store)} enzymes, {residue_store.nbytes() / 2**20:.1f} MiB (float16) in {residue_path}")
+    print(f"{len(sequences) - len(valid)} invalid sequences (zero vector)")
+
     # Save
-    feat_df.to_csv(output_file, index=False)
-    print(f"Saved ESM-2 enzyme features (dim={dim}) to {output_file}")
+    save_features(ids, features_arr, path=output_file, dtype=dtype)
+    print(f"Saved ESM-2 enzyme features (dim={features_arr.shape[1]}, {dtype}) to {output_file}.npy")
+    if export_csv:
+        embedding_frame(ids, features_arr).to_csv(csv_file, index=False)
+        print(f"Exported CSV copy to {csv_file}")
 
 if __name__ == "__main__":
-    generate_features()
+    parser = argparse.ArgumentParser(description="Generate ESM-2 enzyme features.")
+    parser.add_argument("--pooling", choices=POOLING_MODES, default='mean',
+                        help="'mean' over all tokens (matches the trained predictor) or 'residue_mean' (excludes BOS/EOS)")
+    parser.add_argument("--max-tokens", type=int, default=8192, help="Padded tokens per batch")
+    parser.add_argument("--max-batch-size", type=int, default=256)
+    parser.add_argument("--no-cache", action="store_true", help="Recompute every embedding (ignore the embedding store)")
+    parser.add_argument("--dtype", choices=DTYPES, default='float32', help="Storage precision of the feature store")
+    parser.add_argument("--csv", action="store_true", help="Also write enzyme_features.csv")
+    parser.add_argument("--mode", default=DEFAULT_INFERENCE_MODE,
+                        help=f"Inference mode: 'fp32' or a '+'-join of {INFERENCE_OPTIONS} (check with benchmark_esm.py)")
+    parser.add_argument("--threads", type=int, default=DEFAULT_NUM_THREADS, help="Intra-op threads for CPU inference")
+    parser.add_argument("--windowed", action="store_true",
+                        help="Embed sequences longer than the model context with overlapping windows instead of truncating")
+    parser.add_argument("--residues", action="store_true",
+                        help="Also persist per-residue embeddings (float16) for position-level reuse")
+    parser.add_argument("--residue-path", default=DEFAULT_RESIDUE_STORE_DIR)
+    args = parser.parse_args()
+    generate_features(pooling=args.pooling, max_tokens_per_batch=args.max_tokens, max_batch_size=args.max_batch_size,
+                      use_cache=not args.no_cache, dtype=args.dtype, export_csv=args.csv,
+                      mode=args.mode, num_threads=args.threads, windowed=args.windowed,
+                      residues=args.residues, residue_path=args.residue_path)
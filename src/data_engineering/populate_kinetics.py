@@ -5,84 +5,80 @@ Overview: Merges Real Anchor Data (5%) with Synthetic Data (95%). Uses determini
 import pandas as pd
 import numpy as np
 import os
-import hashlib
+import sys
+
+sys.path.append(os.path.dirname(__file__))
+from sequence_descriptors import kinetic_descriptors
 
 def get_sequence_properties(sequence):
     """
     Deterministically computes physico-chemical properties from sequence.
     Returns: (hydrophobicity, molecular_weight_proxy, isoelectric_point_proxy)
+    For many sequences at once use sequence_descriptors.kinetic_descriptors.
     """
-    if not isinstance(sequence, str) or len(sequence) < 10:
-        return 0.5, 0.5, 0.5
-        
-    # Simple AA scales
-    hydro = {'A': 1.8, 'R': -4.5, 'N': -3.5, 'D': -3.5, 'C': 2.5, 'Q': -3.5, 'E': -3.5, 'G': -0.4, 
-             'H': -3.2, 'I': 4.5, 'L': 3.8, 'K': -3.9, 'M': 1.9, 'F': 2.8, 'P': -1.6, 'S': -0.8, 
-             'T': -0.7, 'W': -0.9, 'Y': -1.3, 'V': 4.2}
-    
-    score = 0
-    mw = 0
-    # Use a rolling window or sum for consistency
-    for aa in sequence:
-        score += hydro.get(aa, 0.0)
-        mw += 110 # approx AA weight
-        
-    avg_hydro = score / len(sequence)
-    # Normalize to 0-1 range roughly (-4.5 to 4.5)
-    norm_hydro = (avg_hydro + 4.5) / 9.0
-    
-    # Hash for deterministic "randomness" (structural complexity factor)
-    seq_hash = int(hashlib.sha256(sequence.encode('utf-8')).hexdigest(), 16) % 10000 / 10000.0
-    
-    return norm_hydro, mw, seq_hash
+    norm_hydro, mw, seq_hash = kinetic_descriptors([sequence])
+    return float(norm_hydro[0]), float(mw[0]), float(seq_hash[0])
 
 def generate_ground_truth(sequence):
     """
     Generates 'True' Kinetic Parameters based on sequence.
     This replaces random assignment with a function f(sequence) -> properties.
     """
-    if pd.isna(sequence):
-        # Fallback for missing seq
-        return 1.0, 10.0, 10.0, 50.0, 5.0
-        
-    h, mw, s_hash = get_sequence_properties(sequence)
-    
+    kcat, Km, Ki, t_opt, ph_opt = generate_ground_truth_batch([sequence])
+    return kcat[0], Km[0], Ki[0], t_opt[0], ph_opt[0]
+
+def _round(values, ndigits):
+    # Python's round (correctly rounded decimal), not np.round (scale, rint, unscale), which differs on ties
+    return np.array([round(v, ndigits) for v in values.tolist()])
+
+def generate_ground_truth_batch(sequences):
+    """
+    Columnar generate_ground_truth: kinetic parameters for an array of sequences in one pass.
+    Returns: (kcat, Km, Ki, t_opt, ph_opt) arrays, each [n]
+    """
+    sequences = list(sequences)
+    h, mw, s_hash = kinetic_descriptors(sequences)
+
     # Define a "fitness landscape"
     # Optimal Hydrophobicity for this reaction ~ 0.6
     # Optimal MW ~ doesn't matter much but let's say medium is good
-    
+
     # kcat: Driven by structural precision (s_hash) and hydrophobicity
     # Bell curve around h=0.6
-    hydro_fitness = np.exp(-10.0 * (h - 0.6)**2) 
-    
+    hydro_fitness = np.exp(-10.0 * (h - 0.6)**2)
+
     # Hidden Structural Factor (s_hash)
     # Some random sequences are just dead (s_hash < 0.2), some are great
-    struc_fitness = s_hash 
-    if s_hash < 0.2: struc_fitness = 0.01
-    
+    struc_fitness = np.where(s_hash < 0.2, 0.01, s_hash)
+
     base_kcat = 20.0 * hydro_fitness * struc_fitness
     # Range: 0.1 to 20.0
-    kcat = max(0.1, base_kcat)
-    
-    # Km: Substrate affinity. 
+    kcat = np.maximum(0.1, base_kcat)
+
+    # Km: Substrate affinity.
     # Let's say high hydrophobicity = better sticking to Cellulose (lower Km)
     # Km range: 0.5 to 50.0 mM
     # Higher H -> Lower Km
-    Km = 50.0 * (1.0 - h) + 0.5
-    Km = max(0.5, Km)
-    
+    Km = np.maximum(0.5, 50.0 * (1.0 - h) + 0.5)
+
     # Ki: 2 * Km usually
     Ki = Km * (1.5 + 0.5 * s_hash)
-    
+
     # T_opt: More hydrophobic core -> Higher Stability? Maybe.
     # Let's map H to T_opt
     t_opt = 40.0 + 30.0 * h # 40 to 70C
-    
+
     # pH_opt: Hash based
     # 4.0 + 4.0 * s_hash (4 to 8)
     ph_opt = 4.0 + 4.0 * s_hash
-    
-    return round(kcat, 2), round(Km, 2), round(Ki, 2), round(t_opt, 1), round(ph_opt, 1)
+
+    params = [_round(kcat, 2), _round(Km, 2), _round(Ki, 2), _round(t_opt, 1), _round(ph_opt, 1)]
+
+    # Fallback for missing seq
+    missing = pd.isna(pd.Series(sequences, dtype=object)).to_numpy()
+    for column, fallback in zip(params, (1.0, 10.0, 10.0, 50.0, 5.0)):
+        column[missing] = fallback
+    return tuple(params)
 
 def populate_kinetics():
     input_file = "data/raw/oed_100.csv"
@@ -96,57 +92,34 @@ def populate_kinetics():
     print(f"Loaded {len(df)} enzymes.")
     
     # 1. Define Anchors (Ground Truth from Literature)
-    anchors = {
+    anchors = pd.DataFrame.from_dict({
         'GUN1_HYPJE': { 'kcat': 0.5, 'Km': 0.5, 'Ki': 5.0, 't_opt': 50.0, 'ph_opt': 5.0 },
         'GUN2_THEFU': { 'kcat': 2.5, 'Km': 2.0, 'Ki': 8.0, 't_opt': 65.0, 'ph_opt': 6.0 },
         'GUN25_ARATH': { 'kcat': 1.0, 'Km': 5.0, 'Ki': 10.0, 't_opt': 35.0, 'ph_opt': 7.0 },
-    }
+    }, orient='index')
     
     # 2. Populate Columns
-    kcats = []
-    Kms = []
-    Kis = []
-    t_opts = []
-    ph_opts = []
-    specificities = []
-    sources = []
-    
     np.random.seed(42) # For specificity assignment only
-    
-    for idx, row in df.iterrows():
-        eid = row['id']
-        seq = row.get('sequence', '')
-        
-        # Determine Specificity
-        rand_spec = np.random.choice(['Cellulase', 'Xylanase', 'Other'], p=[0.6, 0.3, 0.1])
-        specificities.append(rand_spec)
-        
-        if eid in anchors:
-            vals = anchors[eid]
-            sources.append("Literature (Anchor)")
-            kcats.append(vals['kcat'])
-            Kms.append(vals['Km'])
-            Kis.append(vals['Ki'])
-            t_opts.append(vals['t_opt'])
-            ph_opts.append(vals['ph_opt'])
-        else:
-            # Deterministic Generation
-            k, km, ki, t, p = generate_ground_truth(seq)
-            
-            sources.append("Biophysical_Model_v1")
-            kcats.append(k)
-            Kms.append(km)
-            Kis.append(ki)
-            t_opts.append(t)
-            ph_opts.append(p)
-
-    df['kcat'] = kcats
-    df['Km'] = Kms
-    df['Ki'] = Kis
-    df['t_opt'] = t_opts
-    df['ph_opt'] = ph_opts
+    # Determine Specificity (one draw per row, same stream as drawing row by row)
+    specificities = np.random.choice(['Cellulase', 'Xylanase', 'Other'], size=len(df), p=[0.6, 0.3, 0.1])
+
+    # Deterministic Generation
+    sequences = df['sequence'] if 'sequence' in df.columns else pd.Series([''] * len(df))
+    params = dict(zip(['kcat', 'Km', 'Ki', 't_opt', 'ph_opt'], generate_ground_truth_batch(sequences)))
+    kinetics = pd.DataFrame(params, index=df.index)
+    kinetics['source_type'] = "Biophysical_Model_v1"
+
+    # Anchor overrides: left merge on id, anchor values win where matched
+    matched = df[['id']].merge(anchors, left_on='id', right_index=True, how='left').drop(columns='id')
+    matched.index = df.index
+    is_anchor = matched['kcat'].notna().to_numpy()
+    kinetics.loc[is_anchor, anchors.columns] = matched.loc[is_anchor, anchors.columns]
+    kinetics.loc[is_anchor, 'source_type'] = "Literature (Anchor)"
+
+    for col in ['kcat', 'Km', 'Ki', 't_opt', 'ph_opt']:
+        df[col] = kinetics[col]
     df['specificity'] = specificities
-    df['source_type'] = sources
+    df['source_type'] = kinetics['source_type']
     
     # Ensure directory exists
     os.makedirs(os.path.dirname(output_file), exist_ok=True)
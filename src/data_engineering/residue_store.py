@@ -0,0 +1,193 @@
+"""
+Purpose: Per-residue embedding store.
+Overview: Keeps the per-token ESM-2 hidden states (last_hidden_state without BOS/EOS) that pooling throws away, so
+position-aware models, the mutational scan and window pooling can read them back without re-running ESM.
+On disk (append-only, safe to share between processes):
+    residues.f16  raw float16 rows [total residues, dim], one row per residue, read through a NumPy memmap
+    index.tsv     one "<id>\\t<sequence sha256>\\t<offset>\\t<length>" line per enzyme, appended after its rows are written
+    meta.json     vector dimension and embedding model
+Float16 halves the footprint of float32 (dim x 2 bytes per residue). An enzyme stored twice resolves to its latest entry.
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+import numpy as np
+
+sys.path.append(os.path.dirname(__file__))
+from file_lock import FileLock
+
+DEFAULT_RESIDUE_STORE_DIR = os.path.join("data", "processed", "residue_embeddings")
+ROW_DTYPE = np.float16
+
+def sequence_digest(sequence):
+    return hashlib.sha256(sequence.encode('utf-8')).hexdigest()
+
+class ResidueStore:
+    def __init__(self, path=DEFAULT_RESIDUE_STORE_DIR, model_name=None):
+        """
+        Args:
+            path (str): Directory holding the store files.
+            model_name (str): Embedding model key. Checked against the store when both are known;
+                written to a new store on its first append.
+        """
+        self.path = path
+        self.model_name = model_name
+        self.rows_path = os.path.join(path, "residues.f16")
+        self.index_path = os.path.join(path, "index.tsv")
+        self.meta_path = os.path.join(path, "meta.json")
+        self.lock_path = os.path.join(path, ".lock")
+
+        self.dim = None
+        self._entries = {}  # id -> (sequence digest, offset, length)
+        self._index_offset = 0
+        self._rows = None
+        self._lock = threading.Lock()
+
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            self.dim = meta['dim']
+            if model_name is not None and meta.get('model') not in (None, model_name):
+                raise ValueError(f"Residue store {path} holds '{meta['model']}' embeddings, not '{model_name}'")
+            self.model_name = meta.get('model', model_name)
+        self._refresh()
+
+    def _refresh(self):
+        """
+        Picks up entries appended since the last read (by this or another process).
+        """
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_offset)
+            chunk = f.read()
+        # Only consume complete lines; a concurrent writer may be mid-line
+        end = chunk.rfind(b"\n") + 1
+        for line in chunk[:end].decode('utf-8').splitlines():
+            eid, digest, offset, length = line.split("\t")
+            self._entries[eid] = (digest, int(offset), int(length))
+        self._index_offset += end
+
+        if self.dim is None and os.path.exists(self.meta_path):
+            # Empty when this instance was created; another process has since written meta
+            with open(self.meta_path, encoding="utf-8") as f:
+                self.dim = json.load(f)['dim']
+        n_rows = max((o + n for _, o, n in self._entries.values()), default=0)
+        if n_rows and (self._rows is None or self._rows.shape[0] < n_rows):
+            self._rows = np.memmap(self.rows_path, dtype=ROW_DTYPE, mode='r', shape=(n_rows, self.dim))
+
+    def __contains__(self, eid):
+        return str(eid) in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def ids(self):
+        return list(self._entries)
+
+    def length(self, eid):
+        """
+        Number of stored residues (the sequence length, or the model context for truncated sequences).
+        """
+        return self._entries[str(eid)][2]
+
+    def has(self, eid, sequence):
+        """
+        True if `eid` is stored and was embedded from exactly `sequence`.
+        """
+        entry = self._entries.get(str(eid))
+        return entry is not None and entry[0] == sequence_digest(sequence)
+
+    def get(self, eid, start=0, stop=None):
+        """
+        Hidden states of residues [start, stop) of enzyme `eid` (0-based, like slicing the sequence).
+
+        Returns:
+            np.ndarray [stop - start, dim] float16, a read-only view into the memory map.
+        """
+        with self._lock:
+            if str(eid) not in self._entries:
+                self._refresh()
+            if str(eid) not in self._entries:
+                raise KeyError(f"Enzyme '{eid}' is not in the residue store")
+            _, offset, length = self._entries[str(eid)]
+            stop = length if stop is None else stop
+            if not 0 <= start <= stop <= length:
+                raise IndexError(f"Residue range [{start}, {stop}) outside the {length} stored residues of '{eid}'")
+            return self._rows[offset + start:offset + stop]
+
+    def get_many(self, items):
+        """
+        Batch access. Items are ids (all residues) or (id, start, stop) tuples.
+
+        Returns:
+            list of np.ndarray [n_residues, dim] float16, in input order.
+        """
+        out = []
+        for item in items:
+            if isinstance(item, tuple):
+                out.append(self.get(*item))
+            else:
+                out.append(self.get(item))
+        return out
+
+    def mean(self, eid, start=0, stop=None):
+        """
+        Mean hidden state over residues [start, stop), accumulated in float32 (a 'residue_mean' pooled vector
+        of a domain or window).
+        """
+        return self.get(eid, start, stop).astype(np.float32).mean(axis=0)
+
+    def put_many(self, ids, sequences, states):
+        """
+        Appends per-residue states (one [n_residues, dim] array per enzyme) as float16.
+        Enzymes already stored for the same sequence are skipped.
+        """
+        if not (len(ids) == len(sequences) == len(states)):
+            raise ValueError("ids, sequences and states must have the same length")
+
+        with self._lock, FileLock(self.lock_path):
+            self._refresh()
+            new = []
+            for eid, seq, arr in zip(ids, sequences, states):
+                arr = np.asarray(arr)
+                if arr.ndim != 2:
+                    raise ValueError("states must be [n_residues, dim] arrays")
+                if self.dim is None:
+                    self.dim = int(arr.shape[1])
+                    with open(self.meta_path, "w", encoding="utf-8") as f:
+                        json.dump({'dim': self.dim, 'model': self.model_name}, f)
+                elif arr.shape[1] != self.dim:
+                    raise ValueError(f"Embedding dim {arr.shape[1]} does not match store dim {self.dim}")
+                digest = sequence_digest(seq)
+                if self._entries.get(str(eid), (None,))[0] != digest:
+                    new.append((str(eid), digest, arr.astype(ROW_DTYPE)))
+            if not new:
+                return
+
+            row_bytes = self.dim * np.dtype(ROW_DTYPE).itemsize
+            with open(self.rows_path, "ab") as f:
+                # Drop partial rows left by an interrupted writer (their index line was never written)
+                offset = f.tell() // row_bytes
+                f.truncate(offset * row_bytes)
+                for _, _, arr in new:
+                    f.write(arr.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            lines = []
+            for eid, digest, arr in new:
+                lines.append(f"{eid}\t{digest}\t{offset}\t{len(arr)}\n")
+                offset += len(arr)
+            # Index lines only after their rows are on disk: an indexed range is always complete
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write("".join(lines))
+            self._refresh()
+
+    def nbytes(self):
+        """
+        Size of the residue rows on disk.
+        """
+        return os.path.getsize(self.rows_path) if os.path.exists(self.rows_path) else 0
@@ -0,0 +1,168 @@
+"""
+Purpose: Vectorized sequence descriptors.
+Overview: Shared by populate_kinetics (ground-truth kinetics) and the Design Engine (radar chart). Sequences are encoded
+once into a padded uint8 matrix of residue codes; descriptors for thousands of sequences then come from NumPy lookup
+tables and bincount instead of per-residue Python loops:
+    composition      residue counts per sequence
+    hydropathy       Kyte-Doolittle sum / mean
+    net charge       (R + K) - (D + E)
+    aliphatic ratio  (A + V + L + I) / (G + S + 1)
+    sequence hash    sha256-derived fraction in [0, 1)
+Sums are accumulated residue by residue in sequence order, so results are bit-identical to the scalar loops they replace.
+"""
+import hashlib
+import numpy as np
+
+AMINO_ACIDS = 'ACDEFGHIKLMNPQRSTVWY'
+UNKNOWN_CODE = len(AMINO_ACIDS)   # any other character
+PAD_CODE = len(AMINO_ACIDS) + 1   # beyond the end of a sequence
+N_CODES = len(AMINO_ACIDS) + 2
+
+KYTE_DOOLITTLE = {
+    'A': 1.8, 'R': -4.5, 'N': -3.5, 'D': -3.5, 'C': 2.5, 'Q': -3.5, 'E': -3.5, 'G': -0.4,
+    'H': -3.2, 'I': 4.5, 'L': 3.8, 'K': -3.9, 'M': 1.9, 'F': 2.8, 'P': -1.6, 'S': -0.8,
+    'T': -0.7, 'W': -0.9, 'Y': -1.3, 'V': 4.2
+}
+AVERAGE_RESIDUE_MASS = 110  # Da, molecular weight proxy
+
+# Byte -> residue code
+_BYTE_TO_CODE = np.full(256, UNKNOWN_CODE, dtype=np.uint8)
+for _code, _aa in enumerate(AMINO_ACIDS):
+    _BYTE_TO_CODE[ord(_aa)] = _code
+
+# Residue code -> value (unknown residues and padding contribute 0)
+KD_TABLE = np.zeros(N_CODES, dtype=np.float64)
+for _aa, _value in KYTE_DOOLITTLE.items():
+    KD_TABLE[AMINO_ACIDS.index(_aa)] = _value
+
+def _code_mask(residues):
+    mask = np.zeros(N_CODES, dtype=bool)
+    mask[[AMINO_ACIDS.index(aa) for aa in residues]] = True
+    return mask
+
+POSITIVE = _code_mask('RK')
+NEGATIVE = _code_mask('DE')
+ALIPHATIC = _code_mask('AVLI')
+FLEXIBLE = _code_mask('GS')
+
+def encode(sequences):
+    """
+    Residue codes of a list of sequences. Missing values (non-strings) encode as empty sequences.
+
+    Returns:
+        (codes [n, max_len] uint8 padded with PAD_CODE, lengths [n] int64)
+    """
+    texts = [s if isinstance(s, str) else "" for s in sequences]
+    lengths = np.array([len(s) for s in texts], dtype=np.int64)
+    codes = np.full((len(texts), int(lengths.max()) if len(texts) else 0), PAD_CODE, dtype=np.uint8)
+    if lengths.sum():
+        # One character per byte; anything outside latin-1 becomes '?' (an unknown residue)
+        flat = _BYTE_TO_CODE[np.frombuffer("".join(texts).encode('latin-1', errors='replace'), dtype=np.uint8)]
+        # Row-major boolean assignment fills each row's first `length` cells in concatenation order
+        codes[np.arange(codes.shape[1]) < lengths[:, None]] = flat
+    return codes, lengths
+
+def composition(codes, block_residues=1 << 22):
+    """
+    Residue counts [n, len(AMINO_ACIDS) + 1]; the last column counts unknown residues.
+    One bincount per block of rows, keeping the flattened index array to ~block_residues entries.
+    """
+    n, width = codes.shape
+    counts = np.zeros((n, N_CODES), dtype=np.int64)
+    step = max(1, block_residues // max(width, 1))
+    for start in range(0, n, step):
+        block = codes[start:start + step]
+        flat = (np.arange(len(block))[:, None] * N_CODES + block).ravel()
+        counts[start:start + len(block)] = np.bincount(flat, minlength=len(block) * N_CODES).reshape(-1, N_CODES)
+    return counts[:, :PAD_CODE]
+
+def count_of(counts, mask):
+    """
+    Per-sequence count of the residues selected by a code mask (e.g. POSITIVE), from composition().
+    """
+    return counts[:, mask[:PAD_CODE]].sum(axis=1)
+
+def residue_sum(codes, table):
+    """
+    Sum of table[residue] per sequence, added left to right like a Python loop over the residues.
+    """
+    acc = np.zeros(codes.shape[0], dtype=np.float64)
+    for column in np.ascontiguousarray(codes.T):
+        acc += table[column]
+    return acc
+
+def sequence_hash(sequences, modulus=10000):
+    """
+    Deterministic per-sequence fraction int(sha256(seq)) % modulus / modulus; 0.0 for missing sequences.
+    """
+    return np.array([
+        int(hashlib.sha256(s.encode('utf-8')).hexdigest(), 16) % modulus / modulus if isinstance(s, str) else 0.0
+        for s in sequences
+    ], dtype=np.float64)
+
+def describe(sequences):
+    """
+    All descriptors for a list of sequences.
+
+    Returns:
+        dict of arrays [n]: length, hydropathy (mean Kyte-Doolittle), net_charge, aliphatic, flexible,
+        aliphatic_ratio, seq_hash; and 'composition' [n, 21].
+    """
+    codes, lengths = encode(sequences)
+    counts = composition(codes)
+    aliphatic = count_of(counts, ALIPHATIC)
+    flexible = count_of(counts, FLEXIBLE)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        hydropathy = residue_sum(codes, KD_TABLE) / lengths
+    return {
+        'length': lengths,
+        'hydropathy': hydropathy,
+        'net_charge': count_of(counts, POSITIVE) - count_of(counts, NEGATIVE),
+        'aliphatic': aliphatic,
+        'flexible': flexible,
+        'aliphatic_ratio': aliphatic / (flexible + 1),
+        'seq_hash': sequence_hash(sequences),
+        'composition': counts
+    }
+
+def kinetic_descriptors(sequences, min_length=10):
+    """
+    Inputs of the ground-truth kinetics model (populate_kinetics.generate_ground_truth).
+    Sequences shorter than min_length (or missing) get the neutral (0.5, 0.5, 0.5).
+
+    Returns:
+        (normalized hydropathy [n], molecular weight proxy [n], sequence hash [n])
+    """
+    codes, lengths = encode(sequences)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_hydro = residue_sum(codes, KD_TABLE) / lengths
+    # Normalize to 0-1 range roughly (-4.5 to 4.5)
+    norm_hydro = (avg_hydro + 4.5) / 9.0
+    mw = (lengths * AVERAGE_RESIDUE_MASS).astype(np.float64)
+    seq_hash = sequence_hash(sequences)
+
+    short = lengths < min_length
+    norm_hydro[short] = 0.5
+    mw[short] = 0.5
+    seq_hash[short] = 0.5
+    return norm_hydro, mw, seq_hash
+
+def radar_scores(sequences):
+    """
+    Radar-chart scores on a 1-5 scale (see DesignEngine.calculate_properties).
+
+    Returns:
+        (hydrophobicity [n], charge [n], stability [n]), unrounded; NaN hydrophobicity for empty sequences.
+    """
+    codes, lengths = encode(sequences)
+    counts = composition(codes)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        hydropathy = residue_sum(codes, KD_TABLE) / lengths
+    net_charge = count_of(counts, POSITIVE) - count_of(counts, NEGATIVE)
+    aliphatic_ratio = count_of(counts, ALIPHATIC) / (count_of(counts, FLEXIBLE) + 1)
+
+    # Hydropathy average usually around -0.5 to 0.5; net charge -10 to +10
+    hydro_score = np.clip(3 + hydropathy, 1, 5)
+    charge_score = np.clip(3 + net_charge / 5, 1, 5)
+    stab_score = np.clip(aliphatic_ratio * 3, 1, 5)
+    return hydro_score, charge_score, stab_score
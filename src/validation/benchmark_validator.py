@@ -0,0 +1,96 @@
+"""
+Purpose: Throughput benchmark for the simulation engine.
+Overview: Measures simulations per second of EnzymeValidator with per-call Antimony compilation (legacy) versus reused compiled RoadRunner models,
+and of the vectorized NumPy backend (with its maximum deviation from Tellurium).
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from src.validation.validator import EnzymeValidator
+
+def _random_params(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            'kcat': rng.uniform(0.1, 20.0),
+            'Km': rng.uniform(0.5, 50.0),
+            'ki': rng.uniform(1.0, 100.0),
+            'temp': rng.choice([30.0, 40.0, 50.0, 60.0, 70.0]),
+            'ph': rng.choice([4.0, 5.0, 6.0, 7.0, 8.0]),
+            't_opt': rng.uniform(40.0, 70.0),
+            'ph_opt': rng.uniform(4.0, 8.0)
+        }
+        for _ in range(n)
+    ]
+
+def bench_single(validator, params_list, duration=24*3600):
+    start = time.perf_counter()
+    for p in params_list:
+        validator.run_kinetic_simulation(
+            kcat=p['kcat'], Km=p['Km'], substrate_conc_init=100.0, enzyme_conc=1e-5,
+            duration=duration, temp=p['temp'], ph=p['ph'], ki=p['ki'],
+            t_opt=p['t_opt'], ph_opt=p['ph_opt']
+        )
+    return len(params_list) / (time.perf_counter() - start)
+
+def bench_multi(validator, params_list, duration=24*3600):
+    start = time.perf_counter()
+    for p in params_list:
+        params_EG = {'kcat': p['kcat'], 'Km': p['Km'], 'Ki': p['ki'], 't_opt': p['t_opt'], 'ph_opt': p['ph_opt']}
+        params_BG = {'kcat': p['kcat'] * 0.5, 'Km': p['Km'], 'Ki': p['ki'], 't_opt': p['t_opt'], 'ph_opt': p['ph_opt']}
+        validator.run_multienzyme_simulation(
+            params_EG, params_BG, substrate_conc_init=100.0,
+            conc_EG=1e-5, conc_BG=1e-5, duration=duration, temp=p['temp'], ph=p['ph']
+        )
+    return len(params_list) / (time.perf_counter() - start)
+
+def bench_backends(params_list, duration=24*3600):
+    """
+    Batch throughput of both backends on the same conditions, plus max |P_numpy - P_tellurium|.
+    """
+    args = dict(
+        kcat=[p['kcat'] for p in params_list], Km=[p['Km'] for p in params_list],
+        substrate_conc_init=100.0, enzyme_conc=1e-5, duration=duration,
+        temp=[p['temp'] for p in params_list], ph=[p['ph'] for p in params_list],
+        ki=[p['ki'] for p in params_list],
+        t_opt=[p['t_opt'] for p in params_list], ph_opt=[p['ph_opt'] for p in params_list]
+    )
+    results = {}
+    for backend in ('tellurium', 'numpy'):
+        start = time.perf_counter()
+        _, _, p_conc = EnzymeValidator(backend=backend).run_kinetic_simulation_batch(**args)
+        results[backend] = (len(params_list) / (time.perf_counter() - start), p_conc)
+    max_dev = float(np.nanmax(np.abs(results['numpy'][1] - results['tellurium'][1])))
+    return results['tellurium'][0], results['numpy'][0], max_dev
+
+def run_benchmark(n_sims=200):
+    params_list = _random_params(n_sims)
+
+    legacy = EnzymeValidator(reuse_models=False)
+    compiled = EnzymeValidator(reuse_models=True)
+
+    # Warm-up (first compile is paid once per process in the compiled path)
+    compiled.run_kinetic_simulation(1.0, 1.0, 100.0)
+    compiled.run_multienzyme_simulation({'kcat': 1.0, 'Km': 1.0, 'Ki': 1.0}, {'kcat': 1.0, 'Km': 1.0, 'Ki': 1.0})
+
+    print(f"Benchmarking {n_sims} simulations per mode...")
+    rows = [
+        ("Single-enzyme", bench_single(legacy, params_list), bench_single(compiled, params_list)),
+        ("EG->BG cascade", bench_multi(legacy, params_list), bench_multi(compiled, params_list)),
+    ]
+
+    print(f"{'Model':<16} {'te.loada (sims/s)':>18} {'compiled (sims/s)':>18} {'speedup':>8}")
+    for name, before, after in rows:
+        print(f"{name:<16} {before:>18.1f} {after:>18.1f} {after / before:>7.1f}x")
+
+    tel_rate, np_rate, max_dev = bench_backends(params_list)
+    print(f"\nBatch backends ({n_sims} conditions): tellurium {tel_rate:.1f} sims/s, "
+          f"numpy {np_rate:.1f} sims/s ({np_rate / tel_rate:.1f}x), max |dP| = {max_dev:.2e} mM")
+    return rows
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    run_benchmark(n)
@@ -0,0 +1,133 @@
+"""
+Purpose: Persistent cache for kinetic simulation results.
+Overview: Content-addressed store in front of EnzymeValidator. Keys are hashes of the canonical kinetic parameters
+(kcat_eff, Km, Ki, E, S0, duration, ...) rounded to a configurable number of significant digits, so identical
+simulations from Streamlit reruns, oracle calls and dataset regenerations are computed once.
+Two tiers: an in-memory LRU (per process) and an on-disk SQLite table (shared across processes and runs).
+"""
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+import numpy as np
+
+DEFAULT_CACHE_PATH = os.path.join("data", "cache", "simulations.sqlite")
+
+class SimulationCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_memory_items=4096, precision=8):
+        """
+        Args:
+            path (str or None): SQLite file for the disk tier (None = memory only).
+            max_memory_items (int): Capacity of the in-memory LRU tier.
+            precision (int): Significant digits kept per parameter when building keys.
+        """
+        self.path = path
+        self.max_memory_items = max_memory_items
+        self.precision = precision
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'writes': 0}
+
+        if self.path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB NOT NULL)")
+
+    def _execute(self, sql, args=()):
+        # Short-lived connections keep the cache usable from Streamlit threads and joblib workers
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            row = conn.execute(sql, args).fetchone()
+            conn.commit()
+            return row
+        finally:
+            conn.close()
+
+    def _canonical(self, value):
+        value = float(value)
+        if not np.isfinite(value):
+            return repr(value)
+        return float(f"{value:.{self.precision}g}")
+
+    def make_key(self, kind, **params):
+        """
+        Content hash of a simulation request. `kind` separates model topologies / output types.
+        """
+        payload = {'kind': kind}
+        for name, value in sorted(params.items()):
+            payload[name] = value if isinstance(value, str) else self._canonical(value)
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        Returns the cached tuple of arrays, or None on a miss.
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return self._memory[key]
+
+        value = None
+        if self.path is not None:
+            row = self._execute("SELECT value FROM results WHERE key = ?", (key,))
+            if row is not None:
+                with np.load(io.BytesIO(row[0])) as data:
+                    value = tuple(self._frozen(data[f'arr_{i}']) for i in range(len(data.files)))
+
+        with self._lock:
+            if value is None:
+                self._stats['misses'] += 1
+                return None
+            self._stats['disk_hits'] += 1
+            self._remember(key, value)
+        return value
+
+    def put(self, key, arrays):
+        """
+        Stores a tuple of arrays in both tiers.
+        """
+        value = tuple(self._frozen(a) for a in arrays)
+        with self._lock:
+            self._remember(key, value)
+            self._stats['writes'] += 1
+        if self.path is not None:
+            buf = io.BytesIO()
+            np.savez(buf, *value)
+            self._execute("INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)", (key, buf.getvalue()))
+
+    @staticmethod
+    def _frozen(array):
+        # Cached results are shared between callers: store read-only copies
+        array = np.array(array)
+        array.setflags(write=False)
+        return array
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def stats(self):
+        """
+        Hit/miss statistics since construction.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_items'] = len(self._memory)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """
+        Drops both tiers (statistics are kept).
+        """
+        with self._lock:
+            self._memory.clear()
+        if self.path is not None:
+            self._execute("DELETE FROM results")
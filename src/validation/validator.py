@@ -3,11 +3,132 @@ import numpy as np
 Purpose: Simulation engine for enzyme kinetics.
 Overview: Uses Tellurium/Roadrunner to simulate Michaelis-Menten kinetics. Calculates product yield over time given enzyme parameters and environmental conditions (Temp, pH).
 """
+import threading
 import tellurium as te
+from src.validation.vectorized_kinetics import integrate_rk45, integrate_to_threshold, mm_inhibition_rhs, cascade_rhs
+from src.validation.analytic_kinetics import product_at_time, time_for_product
+
+# Simulation backends: 'tellurium' (RoadRunner/CVODE, one solve per condition),
+# 'numpy' (vectorized RK45 over arrays of conditions, see vectorized_kinetics.py)
+# or 'analytic' (integrated rate law for the single-enzyme model, see analytic_kinetics.py;
+# the EG->BG cascade has no closed form and is integrated with the numpy RK45 scheme instead)
+BACKENDS = ('tellurium', 'numpy', 'analytic')
+
+# Model Topologies (compiled once, parameters overwritten per call)
+SINGLE_ENZYME_MODEL = """
+model EnzymeModel
+    # Species
+    species S, P;
+
+    # Initial Conditions
+    S = 100.0;
+    P = 0.0;
+    E = 1e-6;
+
+    # Parameters
+    kcat_eff = 1.0;
+    Km = 1.0;
+    Ki = 10.0;
+
+    # Reaction: Michaelis-Menten with Competitive Product Inhibition
+    # Rate = kcat * [E] * [S] / (Km * (1 + P/Ki) + S)
+    J0: S -> P; kcat_eff * E * S / (Km * (1 + P/Ki) + S);
+end
+"""
+
+MULTI_ENZYME_MODEL = """
+model MultiEnzymeSynergy
+    species S, C2, G;
+
+    # Initial
+    S = 100.0;
+    C2 = 0.0;
+    G = 0.0;
+
+    E_EG = 0.5e-6;
+    E_BG = 0.5e-6;
+
+    # Params EG
+    kcat_EG = 1.0;
+    Km_EG = 1.0;
+    Ki_EG = 10.0; # Inhibited by C2
+
+    # Params BG
+    kcat_BG = 1.0;
+    Km_BG = 1.0;
+    Ki_BG = 10.0; # Inhibited by G
+
+    # Rate 1: S -> C2 (EG)
+    # Competitive Inhibition by Product (C2)
+    J1: S -> C2; kcat_EG * E_EG * S / (Km_EG * (1 + C2/Ki_EG) + S);
+
+    # Rate 2: C2 -> G (BG)
+    # Competitive Inhibition by Product (G)
+    J2: C2 -> G; kcat_BG * E_BG * C2 / (Km_BG * (1 + G/Ki_BG) + C2);
+end
+"""
+
+# RoadRunner instances are not thread-safe (Streamlit runs sessions in threads),
+# so compiled models are cached per thread rather than shared globally.
+_compiled_models = threading.local()
+
+def get_compiled_model(antimony_model):
+    """
+    Returns a compiled RoadRunner instance for the given Antimony topology.
+    The Antimony parse + SBML compile runs once per thread; later calls reuse it.
+    """
+    cache = getattr(_compiled_models, 'cache', None)
+    if cache is None:
+        cache = {}
+        _compiled_models.cache = cache
+    r = cache.get(antimony_model)
+    if r is None:
+        r = te.loada(antimony_model)
+        cache[antimony_model] = r
+    return r
 
 class EnzymeValidator:
-    def __init__(self):
-        pass
+    def __init__(self, reuse_models=True, backend='tellurium', cache=None):
+        # reuse_models=False re-parses the Antimony model on every call (legacy path, kept for benchmarking)
+        self.reuse_models = reuse_models
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}'. Choose from {BACKENDS}.")
+        self.backend = backend
+        # Optional SimulationCache (see simulation_cache.py) for single/multi-enzyme results
+        self.cache = cache
+
+    def _cached(self, kind, key_params, compute):
+        """
+        Looks up a simulation result in the cache (if any); computes and stores it on a miss.
+        Failed simulations (first element None) are not cached.
+        """
+        if self.cache is None:
+            return compute()
+        key = self.cache.make_key(kind, backend=self.backend, **key_params)
+        hit = self.cache.get(key)
+        if hit is not None:
+            return hit
+        result = compute()
+        if result[0] is not None:
+            self.cache.put(key, result)
+        return result
+
+    def _load_model(self, antimony_model, params, initial):
+        """
+        Returns a RoadRunner instance with parameters and initial conditions applied.
+        """
+        if self.reuse_models:
+            r = get_compiled_model(antimony_model)
+        else:
+            r = te.loada(antimony_model)
+        # Reset time/state, then overwrite the current state directly.
+        # (Assigning init() values triggers a costly regeneration and restores default parameters.)
+        r.reset()
+        for name, value in initial.items():
+            r[f'[{name}]'] = float(value)
+        for name, value in params.items():
+            r[name] = float(value)
+        return r
 
     def check_structure_validity(self, embedding_vector):
         """
@@ -47,35 +168,40 @@ class EnzymeValidator:
         Model:
         v = (kcat_eff * E * S) / (Km * (1 + P/Ki) + S)
         """
-        
+        kcat_eff = self.calculate_effective_kcat(kcat, temp, ph, t_opt, ph_opt)
+        return self._cached(
+            'single',
+            dict(kcat_eff=kcat_eff, Km=Km, Ki=ki, E=enzyme_conc, S0=substrate_conc_init,
+                 duration=duration, steps=steps),
+            lambda: self._run_kinetic_simulation(
+                kcat, Km, substrate_conc_init, enzyme_conc, duration, steps, temp, ph, ki, t_opt, ph_opt
+            )
+        )
+
+    def _run_kinetic_simulation(self, kcat, Km, substrate_conc_init, enzyme_conc,
+                                duration, steps, temp, ph, ki, t_opt, ph_opt):
+        if self.backend in ('numpy', 'analytic'):
+            try:
+                t, s_conc, p_conc = self.run_kinetic_simulation_batch(
+                    kcat, Km, substrate_conc_init, enzyme_conc=enzyme_conc,
+                    duration=duration, steps=steps, temp=temp, ph=ph,
+                    ki=ki, t_opt=t_opt, ph_opt=ph_opt
+                )
+                return t, np.column_stack((s_conc[0], p_conc[0]))
+            except Exception as e:
+                print(f"Simulation Error: {e}")
+                return None, None
+
         # Calculate Effective parameters
         kcat_eff = self.calculate_effective_kcat(kcat, temp, ph, t_opt, ph_opt)
         
-        # Antimony Model Definition
-        antimony_model = f"""
-        model EnzymeModel
-            # Species
-            species S, P;
-            
-            # Initial Conditions
-            S = {substrate_conc_init};
-            P = 0.0;
-            E = {enzyme_conc};
-            
-            # Parameters
-            kcat_eff = {kcat_eff};
-            Km = {Km};
-            Ki = {ki};
-            
-            # Reaction: Michaelis-Menten with Competitive Product Inhibition
-            # Rate = kcat * [E] * [S] / (Km * (1 + P/Ki) + S)
-            J0: S -> P; kcat_eff * E * S / (Km * (1 + P/Ki) + S);
-        end
-        """
-        
         # Load and Simulate
         try:
-            r = te.loada(antimony_model)
+            r = self._load_model(
+                SINGLE_ENZYME_MODEL,
+                params={'E': enzyme_conc, 'kcat_eff': kcat_eff, 'Km': Km, 'Ki': ki},
+                initial={'S': substrate_conc_init, 'P': 0.0}
+            )
             result = r.simulate(0, duration, steps)
             
             # Extract S and P
@@ -92,6 +218,113 @@ class EnzymeValidator:
             print(f"Simulation Error: {e}")
             return None, None
 
+    def run_kinetic_simulation_batch(self, kcat, Km, substrate_conc_init, enzyme_conc=1e-6,
+                                     duration=24, steps=100,
+                                     temp=50.0, ph=5.0,
+                                     ki=10.0,
+                                     t_opt=50.0, ph_opt=5.0,
+                                     return_errors=False):
+        """
+        Vectorized version of run_kinetic_simulation over many conditions.
+        Every parameter may be a scalar or an array; all are broadcast to a common length n.
+
+        With backend='numpy' all conditions are integrated together in one RK45 pass.
+        With backend='analytic' the integrated rate law is evaluated at every time point.
+        With backend='tellurium' the compiled model is run once per condition (failed rows are NaN).
+
+        Returns:
+            t (steps,), S (n, steps), P (n, steps)
+            plus, if return_errors=True, a list of (row, exception class name, message) for failed rows.
+        """
+        kcat, Km, S0, E, temp, ph, ki, t_opt, ph_opt = np.broadcast_arrays(
+            *[np.atleast_1d(np.asarray(x, dtype=float))
+              for x in (kcat, Km, substrate_conc_init, enzyme_conc, temp, ph, ki, t_opt, ph_opt)]
+        )
+        kcat_eff = self.calculate_effective_kcat(kcat, temp, ph, t_opt, ph_opt)
+        t = np.linspace(0.0, duration, steps)
+        n = kcat_eff.shape[0]
+
+        if self.backend == 'numpy':
+            y0 = np.column_stack((S0, np.zeros(n)))
+            traj = integrate_rk45(
+                mm_inhibition_rhs, y0, t,
+                params={'kcat_eff': kcat_eff, 'E': E, 'Km': Km, 'Ki': ki}
+            )
+            result = (t, traj[:, :, 0], traj[:, :, 1])
+            return result + ([],) if return_errors else result
+
+        if self.backend == 'analytic':
+            p_conc = product_at_time(
+                t[None, :], S0[:, None], Km[:, None], ki[:, None], (kcat_eff * E)[:, None]
+            )
+            result = (t, S0[:, None] - p_conc, p_conc)
+            return result + ([],) if return_errors else result
+
+        s_conc = np.full((n, steps), np.nan)
+        p_conc = np.full((n, steps), np.nan)
+        errors = []
+        for i in range(n):
+            try:
+                r = self._load_model(
+                    SINGLE_ENZYME_MODEL,
+                    params={'E': E[i], 'kcat_eff': kcat_eff[i], 'Km': Km[i], 'Ki': ki[i]},
+                    initial={'S': S0[i], 'P': 0.0}
+                )
+                result = r.simulate(0, duration, steps)
+                s_conc[i] = result['[S]']
+                p_conc[i] = result['[P]']
+            except Exception as e:
+                errors.append((i, type(e).__name__, str(e)))
+                if not return_errors:
+                    print(f"Simulation Error (row {i}): {e}")
+        if return_errors:
+            return t, s_conc, p_conc, errors
+        return t, s_conc, p_conc
+
+    def calculate_final_product(self, kcat, Km, substrate_conc_init, enzyme_conc=1e-6,
+                                duration=24,
+                                temp=50.0, ph=5.0,
+                                ki=10.0,
+                                t_opt=50.0, ph_opt=5.0):
+        """
+        Product concentration at t = duration for the single-enzyme model, from the
+        integrated rate law (no ODE integration, no trajectory). Equivalent to
+        run_kinetic_simulation(...)[1][-1, 1]. Vectorized: any parameter may be an array.
+        """
+        kcat_eff = self.calculate_effective_kcat(kcat, temp, ph, t_opt, ph_opt)
+        p_final = product_at_time(duration, substrate_conc_init, Km, ki, np.multiply(kcat_eff, enzyme_conc))
+        return p_final if np.ndim(p_final) else float(p_final)
+
+    def calculate_time_to_product(self, kcat, Km, substrate_conc_init, product_target, enzyme_conc=1e-6,
+                                  temp=50.0, ph=5.0,
+                                  ki=10.0,
+                                  t_opt=50.0, ph_opt=5.0):
+        """
+        Exact time (seconds) at which the single-enzyme model reaches product_target,
+        from the integrated rate law (np.inf if product_target >= substrate_conc_init).
+        Vectorized: any parameter may be an array.
+        """
+        kcat_eff = self.calculate_effective_kcat(kcat, temp, ph, t_opt, ph_opt)
+        t = time_for_product(product_target, substrate_conc_init, Km, ki, np.multiply(kcat_eff, enzyme_conc))
+        return t if np.ndim(t) else float(t)
+
+    def _cascade_params(self, params_EG, params_BG, conc_EG, conc_BG, temp, ph):
+        """
+        Effective parameters of the EG->BG cascade (names match MULTI_ENZYME_MODEL).
+        """
+        # Calculate Effective kcat for both
+        kcat_eff_EG = self.calculate_effective_kcat(
+            params_EG['kcat'], temp, ph, params_EG.get('t_opt', 50), params_EG.get('ph_opt', 5)
+        )
+        kcat_eff_BG = self.calculate_effective_kcat(
+            params_BG['kcat'], temp, ph, params_BG.get('t_opt', 50), params_BG.get('ph_opt', 5)
+        )
+        return {
+            'E_EG': conc_EG, 'E_BG': conc_BG,
+            'kcat_EG': kcat_eff_EG, 'Km_EG': params_EG['Km'], 'Ki_EG': params_EG['Ki'],
+            'kcat_BG': kcat_eff_BG, 'Km_BG': params_BG['Km'], 'Ki_BG': params_BG['Ki']
+        }
+
     def run_multienzyme_simulation(self, 
                                    params_EG, params_BG,
                                    substrate_conc_init=100.0, 
@@ -103,52 +336,95 @@ class EnzymeValidator:
         
         params_EG/BG: dict with {kcat, Km, Ki, t_opt, ph_opt}
         """
-        
-        # Calculate Effective kcat for both
-        kcat_eff_EG = self.calculate_effective_kcat(
-            params_EG['kcat'], temp, ph, params_EG.get('t_opt', 50), params_EG.get('ph_opt', 5)
-        )
-        kcat_eff_BG = self.calculate_effective_kcat(
-            params_BG['kcat'], temp, ph, params_BG.get('t_opt', 50), params_BG.get('ph_opt', 5)
+        params = self._cascade_params(params_EG, params_BG, conc_EG, conc_BG, temp, ph)
+        return self._cached(
+            'multi',
+            dict(params, S0=substrate_conc_init, duration=duration, steps=steps),
+            lambda: self._run_multienzyme_simulation(params, substrate_conc_init, duration, steps)
         )
-        
-        model = f"""
-        model MultiEnzymeSynergy
-            species S, C2, G;
-            
-            # Initial
-            S = {substrate_conc_init};
-            C2 = 0.0;
-            G = 0.0;
-            
-            E_EG = {conc_EG};
-            E_BG = {conc_BG};
-            
-            # Params EG
-            kcat_EG = {kcat_eff_EG};
-            Km_EG = {params_EG['Km']};
-            Ki_EG = {params_EG['Ki']}; # Inhibited by C2
-            
-            # Params BG
-            kcat_BG = {kcat_eff_BG};
-            Km_BG = {params_BG['Km']};
-            Ki_BG = {params_BG['Ki']}; # Inhibited by G
-            
-            # Rate 1: S -> C2 (EG)
-            # Competitive Inhibition by Product (C2)
-            J1: S -> C2; kcat_EG * E_EG * S / (Km_EG * (1 + C2/Ki_EG) + S);
-            
-            # Rate 2: C2 -> G (BG)
-            # Competitive Inhibition by Product (G)
-            J2: C2 -> G; kcat_BG * E_BG * C2 / (Km_BG * (1 + G/Ki_BG) + C2);
-        end
-        """
-        
+
+    def _run_multienzyme_simulation(self, params, substrate_conc_init, duration, steps):
+        if self.backend in ('numpy', 'analytic'):
+            try:
+                t = np.linspace(0.0, duration, steps)
+                traj = integrate_rk45(
+                    cascade_rhs, np.array([[substrate_conc_init, 0.0, 0.0]]), t, params=params
+                )[0]
+                return t, traj[:, 0], traj[:, 1], traj[:, 2]
+            except Exception as e:
+                print(f"MultiEnzyme Error: {e}")
+                return None, None, None, None
+
         try:
-            r = te.loada(model)
+            r = self._load_model(
+                MULTI_ENZYME_MODEL,
+                params=params,
+                initial={'S': substrate_conc_init, 'C2': 0.0, 'G': 0.0}
+            )
             result = r.simulate(0, duration, steps)
             return result['time'], result['[S]'], result['[C2]'], result['[G]']
         except Exception as e:
             print(f"MultiEnzyme Error: {e}")
             return None, None, None, None
 
+    def run_multienzyme_endpoint(self,
+                                 params_EG, params_BG,
+                                 substrate_conc_init=100.0,
+                                 conc_EG=0.5e-6, conc_BG=0.5e-6,
+                                 duration=24,
+                                 temp=50.0, ph=5.0):
+        """
+        Final concentrations (S, C2, G) at t = duration, without storing a trajectory.
+        """
+        params = self._cascade_params(params_EG, params_BG, conc_EG, conc_BG, temp, ph)
+        final = self._cached(
+            'multi_endpoint',
+            dict(params, S0=substrate_conc_init, duration=duration),
+            lambda: self._run_multienzyme_endpoint(params, substrate_conc_init, duration)
+        )
+        return tuple(None if c is None else float(c) for c in final)
+
+    def _run_multienzyme_endpoint(self, params, substrate_conc_init, duration):
+        try:
+            if self.backend in ('numpy', 'analytic'):
+                final = integrate_rk45(
+                    cascade_rhs, np.array([[substrate_conc_init, 0.0, 0.0]]),
+                    np.array([0.0, duration]), params=params
+                )[0, -1]
+                return float(final[0]), float(final[1]), float(final[2])
+
+            r = self._load_model(
+                MULTI_ENZYME_MODEL,
+                params=params,
+                initial={'S': substrate_conc_init, 'C2': 0.0, 'G': 0.0}
+            )
+            result = r.simulate(0, duration, 2)
+            return float(result['[S]'][-1]), float(result['[C2]'][-1]), float(result['[G]'][-1])
+        except Exception as e:
+            print(f"MultiEnzyme Error: {e}")
+            return None, None, None
+
+    def find_multienzyme_time_to_target(self,
+                                        params_EG, params_BG, target_conc,
+                                        substrate_conc_init=100.0,
+                                        conc_EG=0.5e-6, conc_BG=0.5e-6,
+                                        max_duration=24,
+                                        temp=50.0, ph=5.0,
+                                        species='G'):
+        """
+        Time (seconds) at which `species` ('C2' or 'G') first reaches target_conc,
+        or None if it is not reached within max_duration.
+        Located by event detection in the RK45 integrator (independent of backend),
+        so no trajectory is allocated and the result is not quantized to an output grid.
+        """
+        params = self._cascade_params(params_EG, params_BG, conc_EG, conc_BG, temp, ph)
+        index = {'C2': 1, 'G': 2}[species]
+        try:
+            t_cross = integrate_to_threshold(
+                cascade_rhs, np.array([[substrate_conc_init, 0.0, 0.0]]), max_duration,
+                params=params, index=index, threshold=target_conc
+            )[0]
+        except Exception as e:
+            print(f"MultiEnzyme Error: {e}")
+            return None
+        return None if np.isnan(t_cross) else float(t_cross)
@@ -0,0 +1,169 @@
+"""
+Purpose: Precomputed, interpolated yield surface for the single-enzyme model.
+Overview: Temperature and pH only scale kcat (EnzymeValidator.calculate_effective_kcat), and in the integrated rate law
+V = kcat_eff * E and the duration t only appear as the product V*t. Made dimensionless by S0, conversion X = P/S0 depends on
+three numbers only:
+
+    tau = V*t/S0,   kappa = Km/S0,   iota = Ki/S0
+
+so one 3-D table over (log10 tau, log10 kappa, log10 iota) answers any enzyme x temp x pH x substrate x duration query
+by trilinear interpolation. Queries outside the table domain fall back to the exact analytic solve.
+"""
+import os
+import sys
+import numpy as np
+from scipy.interpolate import RegularGridInterpolator
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from src.validation.analytic_kinetics import product_at_time
+from src.validation.validator import EnzymeValidator
+
+DEFAULT_TABLE_PATH = os.path.join("models", "yield_table.npz")
+
+class YieldTable:
+    def __init__(self, log_tau, log_kappa, log_iota, conversion):
+        self.log_tau = np.asarray(log_tau, dtype=float)
+        self.log_kappa = np.asarray(log_kappa, dtype=float)
+        self.log_iota = np.asarray(log_iota, dtype=float)
+        self.conversion_grid = np.asarray(conversion, dtype=float)
+        self._interp = RegularGridInterpolator(
+            (self.log_tau, self.log_kappa, self.log_iota), self.conversion_grid
+        )
+        self.validator = EnzymeValidator()
+
+    @classmethod
+    def build(cls, tau_range=(-6.0, 2.0), n_tau=241,
+              kappa_range=(-3.0, 1.0), n_kappa=41,
+              iota_range=(-3.0, 1.5), n_iota=46):
+        """
+        Tabulates exact conversion (integrated rate law) on a log-spaced grid.
+        Default grid (~3.6 MB): max interpolation error ~1e-2 conversion over the whole domain,
+        ~1e-4 for the project's parameter ranges (see error_report).
+        """
+        log_tau = np.linspace(*tau_range, n_tau)
+        log_kappa = np.linspace(*kappa_range, n_kappa)
+        log_iota = np.linspace(*iota_range, n_iota)
+        T, K, I = np.meshgrid(log_tau, log_kappa, log_iota, indexing='ij')
+        conversion = product_at_time(10.0 ** T, 1.0, 10.0 ** K, 10.0 ** I, 1.0)
+        return cls(log_tau, log_kappa, log_iota, conversion)
+
+    def save(self, path=DEFAULT_TABLE_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez_compressed(path, log_tau=self.log_tau, log_kappa=self.log_kappa,
+                            log_iota=self.log_iota, conversion=self.conversion_grid)
+
+    @classmethod
+    def load(cls, path=DEFAULT_TABLE_PATH):
+        with np.load(path) as data:
+            return cls(data['log_tau'], data['log_kappa'], data['log_iota'], data['conversion'])
+
+    @classmethod
+    def load_or_build(cls, path=DEFAULT_TABLE_PATH):
+        if os.path.exists(path):
+            return cls.load(path)
+        table = cls.build()
+        table.save(path)
+        return table
+
+    def conversion(self, V, Km, Ki, S0, duration):
+        """
+        Conversion P/S0 at t = duration for rate constant V = kcat_eff * E (vectorized).
+        """
+        V, Km, Ki, S0, duration = np.broadcast_arrays(
+            *[np.atleast_1d(np.asarray(x, dtype=float)) for x in (V, Km, Ki, S0, duration)]
+        )
+        tau = V * duration / S0
+        kappa = Km / S0
+        iota = Ki / S0
+        with np.errstate(divide='ignore'):
+            q = np.column_stack((np.log10(tau), np.log10(kappa), np.log10(iota)))
+
+        x = np.empty(len(tau))
+        # Below the tau axis the reaction is still in its initial-rate regime: X = tau / (1 + kappa)
+        early = q[:, 0] < self.log_tau[0]
+        inside = (
+            (q[:, 0] >= self.log_tau[0]) & (q[:, 0] <= self.log_tau[-1]) &
+            (q[:, 1] >= self.log_kappa[0]) & (q[:, 1] <= self.log_kappa[-1]) &
+            (q[:, 2] >= self.log_iota[0]) & (q[:, 2] <= self.log_iota[-1])
+        )
+        inside &= ~early
+        x[inside] = self._interp(q[inside])
+        x[early] = tau[early] / (1.0 + kappa[early])
+        outside = ~(inside | early)
+        if outside.any():
+            x[outside] = product_at_time(tau[outside], 1.0, kappa[outside], iota[outside], 1.0)
+        return x
+
+    def final_product(self, V, Km, Ki, S0, duration):
+        return self.conversion(V, Km, Ki, S0, duration) * np.asarray(S0, dtype=float)
+
+    def yield_for_conditions(self, kcat, Km, Ki, temp, ph, t_opt=50.0, ph_opt=5.0,
+                             enzyme_conc=1e-6, substrate_conc_init=100.0, duration=24):
+        """
+        Same quantity as EnzymeValidator.calculate_final_product(...) / substrate_conc_init,
+        answered by table lookup. Any argument may be an array (enzyme x condition grids).
+        """
+        kcat_eff = self.validator.calculate_effective_kcat(kcat, temp, ph, t_opt, ph_opt)
+        return self.conversion(np.multiply(kcat_eff, enzyme_conc), Km, Ki, substrate_conc_init, duration)
+
+    def error_report(self, n_samples=100000, n_simulated=200, seed=0):
+        """
+        Interpolation error of the table against direct computation.
+        - 'domain': uniform samples over the whole table domain vs the exact analytic solve.
+        - 'project': samples from the project's parameter ranges (kcat 0.1-20, Km 0.5-50,
+          Ki = 1.5-2 x Km, temp 30-70, pH 4-8, E = 1e-5 mM, S0 = 100 mM, 24 h) vs the analytic solve.
+        - 'simulation': a subsample of 'project' vs Tellurium simulation (includes solver error).
+        """
+        rng = np.random.default_rng(seed)
+        report = {}
+
+        q = np.column_stack((
+            rng.uniform(self.log_tau[0], self.log_tau[-1], n_samples),
+            rng.uniform(self.log_kappa[0], self.log_kappa[-1], n_samples),
+            rng.uniform(self.log_iota[0], self.log_iota[-1], n_samples)
+        ))
+        exact = product_at_time(10.0 ** q[:, 0], 1.0, 10.0 ** q[:, 1], 10.0 ** q[:, 2], 1.0)
+        report['domain'] = _error_stats(self._interp(q) - exact)
+
+        kcat = rng.uniform(0.1, 20.0, n_samples)
+        Km = rng.uniform(0.5, 50.0, n_samples)
+        Ki = Km * rng.uniform(1.5, 2.0, n_samples)
+        temp = rng.uniform(30.0, 70.0, n_samples)
+        ph = rng.uniform(4.0, 8.0, n_samples)
+        t_opt = rng.uniform(40.0, 70.0, n_samples)
+        ph_opt = rng.uniform(4.0, 8.0, n_samples)
+        args = dict(enzyme_conc=1e-5, substrate_conc_init=100.0, duration=24 * 3600)
+
+        table_yield = self.yield_for_conditions(kcat, Km, Ki, temp, ph, t_opt, ph_opt, **args)
+        exact_yield = self.validator.calculate_final_product(
+            kcat, Km, 100.0, enzyme_conc=1e-5, duration=24 * 3600,
+            temp=temp, ph=ph, ki=Ki, t_opt=t_opt, ph_opt=ph_opt
+        ) / 100.0
+        report['project'] = _error_stats(table_yield - exact_yield)
+
+        idx = rng.choice(n_samples, size=min(n_simulated, n_samples), replace=False)
+        _, _, p_sim = self.validator.run_kinetic_simulation_batch(
+            kcat[idx], Km[idx], 100.0, enzyme_conc=1e-5, duration=24 * 3600, steps=2,
+            temp=temp[idx], ph=ph[idx], ki=Ki[idx], t_opt=t_opt[idx], ph_opt=ph_opt[idx]
+        )
+        report['simulation'] = _error_stats(table_yield[idx] - p_sim[:, -1] / 100.0)
+        return report
+
+def _error_stats(diff):
+    err = np.abs(diff[np.isfinite(diff)])
+    return {
+        'n': int(err.size),
+        'max_abs': float(err.max()),
+        'p99_abs': float(np.percentile(err, 99)),
+        'mean_abs': float(err.mean())
+    }
+
+if __name__ == "__main__":
+    print("Building yield table...")
+    table = YieldTable.build()
+    table.save()
+    print(f"Saved yield table to {DEFAULT_TABLE_PATH} (grid {table.conversion_grid.shape})")
+
+    print("Error report (absolute error in yield fraction):")
+    for name, stats in table.error_report().items():
+        print(f"  {name:<10} n={stats['n']:<7} max={stats['max_abs']:.2e}  p99={stats['p99_abs']:.2e}  mean={stats['mean_abs']:.2e}")
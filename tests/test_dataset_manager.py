@@ -0,0 +1,50 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.data_engineering import dataset_manager
+from src.data_engineering.dataset_manager import DatasetManager, FeedbackJournal
+
+@pytest.fixture
+def paths(tmp_path, monkeypatch):
+    data_path = tmp_path / "enzyme_kinetics.csv"
+    pd.DataFrame([{'id': 'A', 'sequence': 'M' * 20, 'kcat': 1.0, 'Km': 1.0, 'organism': 'x'}]).to_csv(data_path, index=False)
+    monkeypatch.setattr(dataset_manager, 'DATA_PATH', str(data_path))
+    monkeypatch.setattr(dataset_manager, 'AUGMENTED_PATH', str(tmp_path / "enzyme_kinetics_augmented.csv"))
+    monkeypatch.setattr(dataset_manager, 'NOISE_CACHE_PATH', str(tmp_path / "noise_buckets.tsv"))
+    return tmp_path
+
+def entry(eid):
+    return {'id': eid, 'kcat': 2.0, 'Km': 2.0, 'organism': 'x'}
+
+def test_compaction_keeps_feedback_compacted_by_another_session(paths):
+    journal_path = str(paths / "feedback.jsonl")
+    a = DatasetManager(journal_path=journal_path, compact_every=0)  # opened before the augmented table exists
+    b = DatasetManager(journal_path=journal_path, compact_every=0)
+
+    b.augment_dataset(entry('B1'))
+    b.compact()
+    a.augment_dataset(entry('A1'))
+    a.compact()
+
+    assert pd.read_csv(dataset_manager.AUGMENTED_PATH)['id'].tolist() == ['A', 'B1', 'A1']
+    assert a.load_data()['id'].tolist() == ['A', 'B1', 'A1']
+    assert b.load_data()['id'].tolist() == ['A', 'B1', 'A1']
+
+def test_journal_reader_restarts_after_reset(paths):
+    path = str(paths / "feedback.jsonl")
+    writer, reader = FeedbackJournal(path), FeedbackJournal(path)
+    writer.append({'id': 'X1'})
+    writer.append({'id': 'X2'})
+    assert [r['id'] for r in reader.records()] == ['X1', 'X2']
+
+    # Several resets (the file may come back with a reused inode) followed by a new entry
+    with writer.lock():
+        writer.reset()
+    with writer.lock():
+        writer.reset()
+    writer.append({'id': 'Y1'})
+    assert [r['id'] for r in reader.records()] == ['Y1']